@@ -4,4 +4,31 @@ LXC Simple Manager - Backend Package
 A FastAPI-based backend for managing Linux Containers.
 """
 
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 __version__ = "1.0.0"
+
+
+# =============================================================================
+# Logging
+# =============================================================================
+
+# All backend modules log through the "backend" logger. Records are put on
+# a queue by the calling thread and written to stderr by a listener thread,
+# so request handlers never block on console/journal writes. This runs on
+# package import so messages emitted while submodules load are kept.
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+
+_logger = logging.getLogger(__name__)
+_logger.setLevel(logging.INFO)
+_logger.addHandler(QueueHandler(_log_queue))
+_logger.propagate = False
+
+_log_listener.start()
+atexit.register(_log_listener.stop)
@@ -0,0 +1,24 @@
+"""
+LXC Simple Manager - Response Classes
+
+Shared response classes for the API routers.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    
+    orjson serializes dicts and lists of primitives several times faster
+    than the standard library encoder used by JSONResponse. Defined here
+    rather than imported from FastAPI, whose own class is deprecated in
+    recent releases.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
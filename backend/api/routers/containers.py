@@ -7,18 +7,45 @@ Endpoints for container lifecycle operations including:
     - Backup containers to disk
 """
 
+import asyncio
+import hashlib
+import logging
 import os
-import traceback
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+import orjson
+from anyio import CancelScope
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from backend.core.adapter import lxc
-from backend.database import get_setting
-from backend.schemas import ContainerInfo, CreateContainerRequest
+from backend.api.responses import ORJSONResponse
+from backend.core.adapter import BackupConflictError, ContainerRecord, lxc
+from backend.database import cached_get_setting, log_action
+from backend.schemas import BulkContainerRequest, ContainerInfo, CreateContainerRequest
 
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+# =============================================================================
+# Worker Pools
+# =============================================================================
+
+# Long-running jobs get their own bounded pools so they never compete with
+# request handlers for Starlette's threadpool. Backups are CPU/disk heavy,
+# creation is mostly waiting on template downloads.
+_BACKUP_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lxc-backup")
+_CREATE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lxc-create")
+
+
+def shutdown_workers() -> None:
+    """Stop accepting new jobs; running backups/creations are not awaited."""
+    _BACKUP_POOL.shutdown(wait=False)
+    _CREATE_POOL.shutdown(wait=False)
 
 
 # =============================================================================
@@ -27,84 +54,187 @@ router = APIRouter()
 
 DEFAULT_BACKUP_PATH = "/tmp/lxc_backups"
 
+# Backup directories already created by this process
+_ensured_dirs: set[str] = set()
+
 
 def get_backup_path() -> str:
     """
     Get the configured backup directory path.
     
     Reads from database settings, falls back to default if not configured.
-    Ensures the directory exists before returning.
+    Ensures the directory exists before returning; each path is only
+    created once per process.
     """
-    backup_path = get_setting("backup_path", DEFAULT_BACKUP_PATH)
+    backup_path = cached_get_setting("backup_path", DEFAULT_BACKUP_PATH)
     
-    if not os.path.exists(backup_path):
+    if backup_path not in _ensured_dirs:
         try:
             os.makedirs(backup_path, exist_ok=True)
-        except Exception as e:
-            print(f"ERROR: Could not create backup directory: {e}")
+        except OSError as e:
+            logger.error("Could not create backup directory: %s", e)
             backup_path = DEFAULT_BACKUP_PATH
             os.makedirs(backup_path, exist_ok=True)
+        _ensured_dirs.add(backup_path)
     
     return backup_path
 
 
+# =============================================================================
+# Audit Logging
+# =============================================================================
+
 def safe_log_action(action: str, container: str, status: str, details: str = ""):
-    """Safely log an action, ignoring errors if audit table doesn't exist."""
-    try:
-        from backend.database import log_action
-        log_action(action, container, status, details)
-    except Exception as e:
-        print(f"WARNING: Could not log action: {e}")
+    """Queue an action for the audit log (never raises, never blocks)."""
+    log_action(action, container, status, details)
+
+
+# =============================================================================
+# Container List Encoding
+# =============================================================================
+
+# The adapter caches the container list and hands out the same tuple
+# until it refreshes, so the JSON body and its ETag are only recomputed
+# when that object changes.
+_list_body: Optional[Tuple[Tuple[ContainerRecord, ...], bytes, str]] = None  # (containers, body, etag)
+
+
+def _encoded_list(containers: Tuple[ContainerRecord, ...]) -> Tuple[bytes, str]:
+    """Return the JSON-encoded container list and its ETag."""
+    global _list_body
+    
+    cached = _list_body
+    if cached is not None and cached[0] is containers:
+        return cached[1], cached[2]
+    
+    body = orjson.dumps([c.to_dict() for c in containers])
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    _list_body = (containers, body, etag)
+    return body, etag
 
 
 # =============================================================================
 # List and Get Operations
 # =============================================================================
 
-@router.get("/", response_model=List[ContainerInfo])
-def list_containers():
-    """List all LXC containers."""
-    return lxc.list_containers()
+# Read endpoints are async and use the adapter's asyncio-subprocess
+# variants, keeping the event loop free while lxc-ls runs.
+
+# The adapter's records convert to the ContainerInfo shape, so the list is
+# documented via `responses` but served from the pre-encoded body.
+@router.get("/", response_model=None, responses={200: {"model": List[ContainerInfo]}})
+async def list_containers(request: Request):
+    """
+    List all LXC containers.
+    
+    Supports conditional requests: a matching If-None-Match header gets
+    an empty 304 response.
+    """
+    body, etag = _encoded_list(await lxc.alist_containers())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/{name}", response_model=ContainerInfo)
-def get_container(name: str):
+async def get_container(name: str):
     """Get details for a specific container."""
-    container = lxc.get_container(name)
+    container = await lxc.aget_container(name)
     if not container:
         raise HTTPException(status_code=404, detail=f"Container '{name}' not found")
-    return container
+    return container.to_dict()
 
 
 # =============================================================================
 # Lifecycle Operations
 # =============================================================================
 
+# Success bodies are pre-encoded; only the JSON-encoded name is filled in
+_STARTED_BODY = b'{"status":"started","name":%b}'
+_STOPPED_BODY = b'{"status":"stopped","name":%b}'
+_DELETED_BODY = b'{"status":"deleted","name":%b}'
+
+
+def _status_response(template: bytes, name: str) -> Response:
+    """Render a pre-encoded lifecycle success response for a container."""
+    return Response(content=template % orjson.dumps(name), media_type="application/json")
+
+
+# Bulk actions run at most this many lxc-start/lxc-stop processes at once
+_BULK_CONCURRENCY = 8
+
+
+async def _bulk_action(
+    action: str,
+    names: List[str],
+    operation: Callable[[str], Awaitable[None]],
+    done_status: str,
+) -> Dict:
+    """
+    Run an async lifecycle operation on many containers concurrently.
+    
+    Args:
+        action: Audit log action name (e.g. "START")
+        names: Container names; duplicates are ignored
+        operation: Adapter coroutine taking a container name
+        done_status: Status reported for containers that succeeded
+        
+    Returns:
+        {"results": [...]} with one status entry per container, in order
+    """
+    semaphore = asyncio.Semaphore(_BULK_CONCURRENCY)
+    
+    async def run(name: str) -> Dict:
+        async with semaphore:
+            try:
+                await operation(name)
+            except Exception as e:
+                logger.warning("%s failed for container '%s': %s", action, name, e)
+                safe_log_action(action, name, "ERROR", str(e))
+                return {"name": name, "status": "error", "detail": str(e)}
+        safe_log_action(action, name, "SUCCESS")
+        return {"name": name, "status": done_status}
+    
+    results = await asyncio.gather(*(run(name) for name in dict.fromkeys(names)))
+    return {"results": results}
+
+
+# Registered before /{name}/start so "bulk" is not taken as a container name
+@router.post("/bulk/start")
+async def start_containers(req: BulkContainerRequest):
+    """Start several containers concurrently; failures are reported per container."""
+    return await _bulk_action("START", req.names, lxc.astart_container, "started")
+
+
+@router.post("/bulk/stop")
+async def stop_containers(req: BulkContainerRequest):
+    """Stop several containers concurrently; failures are reported per container."""
+    return await _bulk_action("STOP", req.names, lxc.astop_container, "stopped")
+
+
 @router.post("/{name}/start")
-def start_container(name: str):
+async def start_container(name: str):
     """Start a stopped container."""
     try:
-        lxc.start_container(name)
+        await lxc.astart_container(name)
         safe_log_action("START", name, "SUCCESS")
-        return {"status": "started", "name": name}
+        return _status_response(_STARTED_BODY, name)
     except Exception as e:
-        # Print full traceback to logs for debugging
-        print(f"ERROR starting container '{name}':")
-        traceback.print_exc()
+        logger.exception("Failed to start container '%s'", name)
         safe_log_action("START", name, "ERROR", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/{name}/stop")
-def stop_container(name: str):
+async def stop_container(name: str):
     """Stop a running container."""
     try:
-        lxc.stop_container(name)
+        await lxc.astop_container(name)
         safe_log_action("STOP", name, "SUCCESS")
-        return {"status": "stopped", "name": name}
+        return _status_response(_STOPPED_BODY, name)
     except Exception as e:
-        print(f"ERROR stopping container '{name}':")
-        traceback.print_exc()
+        logger.exception("Failed to stop container '%s'", name)
         safe_log_action("STOP", name, "ERROR", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -114,9 +244,9 @@ def stop_container(name: str):
 # =============================================================================
 
 @router.post("/")
-async def create_container(req: CreateContainerRequest, bg: BackgroundTasks):
+async def create_container(req: CreateContainerRequest):
     """Create a new container (asynchronous)."""
-    if lxc.get_container(req.name):
+    if await lxc.aget_container(req.name):
         raise HTTPException(status_code=400, detail=f"Container '{req.name}' already exists")
     
     def _create():
@@ -124,11 +254,10 @@ async def create_container(req: CreateContainerRequest, bg: BackgroundTasks):
             lxc.create_container(req.name, req.distro, req.release, req.arch)
             safe_log_action("CREATE", req.name, "SUCCESS", f"{req.distro}/{req.release}/{req.arch}")
         except Exception as e:
-            print(f"ERROR creating container '{req.name}':")
-            traceback.print_exc()
+            logger.exception("Failed to create container '%s'", req.name)
             safe_log_action("CREATE", req.name, "ERROR", str(e))
     
-    bg.add_task(_create)
+    _CREATE_POOL.submit(_create)
     return {"status": "creation_initiated", "name": req.name}
 
 
@@ -138,10 +267,9 @@ def delete_container(name: str):
     try:
         lxc.delete_container(name)
         safe_log_action("DELETE", name, "SUCCESS")
-        return {"status": "deleted", "name": name}
+        return _status_response(_DELETED_BODY, name)
     except Exception as e:
-        print(f"ERROR deleting container '{name}':")
-        traceback.print_exc()
+        logger.exception("Failed to delete container '%s'", name)
         safe_log_action("DELETE", name, "ERROR", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -151,32 +279,77 @@ def delete_container(name: str):
 # =============================================================================
 
 @router.post("/{name}/backup")
-def backup_container(name: str, bg: BackgroundTasks):
+def backup_container(name: str):
     """Create a backup of a container (asynchronous)."""
     backup_path = get_backup_path()
     
     def _backup():
         try:
-            print(f"INFO: Starting backup of '{name}' to {backup_path}...")
-            filename = lxc.backup_container(name, backup_path)
+            logger.info("Starting backup of '%s' to %s...", name, backup_path)
+            filename = lxc.backup_container(name, backup_path, compression="zstd")
             full_path = os.path.join(backup_path, filename)
-            print(f"INFO: Backup complete: {full_path}")
+            logger.info("Backup complete: %s", full_path)
             safe_log_action("BACKUP", name, "SUCCESS", full_path)
         except Exception as e:
-            print(f"ERROR: Backup failed for '{name}':")
-            traceback.print_exc()
+            logger.exception("Backup failed for '%s'", name)
             safe_log_action("BACKUP", name, "ERROR", str(e))
     
-    bg.add_task(_backup)
+    _BACKUP_POOL.submit(_backup)
     return {"status": "backup_started", "name": name, "destination": backup_path}
 
 
+async def _audited_stream(name: str, filename: str, chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Relay backup chunks to the client, logging the outcome once done.
+    
+    The adapter's generator is advanced and closed on worker threads, so
+    removing its snapshot never blocks the event loop.
+    """
+    status, details = "ERROR", f"download of {filename} aborted"
+    try:
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+        status, details = "SUCCESS", f"streamed {filename}"
+    except Exception as e:
+        logger.exception("Backup stream failed for '%s'", name)
+        details = str(e)
+        raise
+    finally:
+        with CancelScope(shield=True):
+            await run_in_threadpool(chunks.close)
+        safe_log_action("BACKUP", name, status, details)
+
+
+@router.get("/{name}/backup/download")
+async def download_backup(name: str):
+    """
+    Stream a fresh backup of a container straight to the client.
+    
+    Running containers are only streamed from a snapshot (409 otherwise),
+    so a slow download never keeps a container stopped.
+    """
+    try:
+        filename, media_type, chunks = await run_in_threadpool(
+            lxc.stream_backup, name, compression="zstd"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except BackupConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return StreamingResponse(
+        _audited_stream(name, filename, chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # =============================================================================
 # Monitoring Operations
 # =============================================================================
 
 @router.get("/{name}/logs")
-def get_container_logs(name: str, lines: int = 100):
+async def get_container_logs(name: str, lines: int = 100):
     """
     Get recent logs from a container.
     
@@ -191,7 +364,7 @@ def get_container_logs(name: str, lines: int = 100):
     lines = min(max(1, lines), 1000)
     
     try:
-        logs = lxc.get_container_logs(name, lines)
+        logs = await run_in_threadpool(lxc.get_container_logs, name, lines)
         return {"name": name, "lines": lines, "content": logs}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -200,7 +373,7 @@ def get_container_logs(name: str, lines: int = 100):
 
 
 @router.get("/{name}/stats")
-def get_container_stats(name: str):
+async def get_container_stats(name: str):
     """
     Get resource usage statistics for a container.
     
@@ -213,7 +386,7 @@ def get_container_stats(name: str):
         Resource statistics
     """
     try:
-        stats = lxc.get_container_stats(name)
+        stats = await lxc.aget_container_stats(name)
         return stats
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -9,12 +9,14 @@ Endpoints for managing:
 from typing import Dict, List
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
+from backend.api.responses import ORJSONResponse
 from backend.core.network import net_manager
 from backend.database import PortMapping
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 # =============================================================================
@@ -22,14 +24,14 @@ router = APIRouter()
 # =============================================================================
 
 @router.get("/dhcp")
-def get_dhcp_leases() -> Dict[str, str]:
+async def get_dhcp_leases() -> Dict[str, str]:
     """
     Get all static DHCP assignments.
     
     Returns:
         Dict mapping container names to IP addresses
     """
-    return net_manager.get_static_ips()
+    return await run_in_threadpool(net_manager.get_static_ips)
 
 
 @router.post("/dhcp")
@@ -81,14 +83,14 @@ def delete_dhcp_lease(name: str):
 # =============================================================================
 
 @router.get("/rules", response_model=List[PortMapping])
-def get_rules():
+async def get_rules():
     """
     Get all port forwarding rules.
     
     Returns:
         List of PortMapping objects
     """
-    return net_manager.get_port_forwards()
+    return await run_in_threadpool(net_manager.get_port_forwards)
 
 
 @router.post("/rules")
@@ -96,7 +98,8 @@ def add_rule(rule: PortMapping):
     """
     Add a new port forwarding rule.
     
-    The rule is immediately applied to iptables.
+    The rule is applied to iptables shortly after; changes made in quick
+    succession are synced together.
     
     Args:
         rule: Port mapping configuration
@@ -117,12 +120,40 @@ def add_rule(rule: PortMapping):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/rules/bulk")
+async def add_rules(rules: List[PortMapping]):
+    """
+    Add several port forwarding rules in one request.
+    
+    The rules are stored in a single transaction and applied to iptables
+    in one batch. If any port is already in use, nothing is added.
+    
+    Args:
+        rules: Port mapping configurations
+        
+    Returns:
+        Success status with the created rules
+        
+    Raises:
+        HTTPException: 400 if a port is already in use or repeated
+        HTTPException: 500 on system error
+    """
+    try:
+        await net_manager.aadd_forwarding_rules(rules)
+        return {"status": "added", "rules": rules}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/rules/{port}")
 def delete_rule(port: int):
     """
     Delete a port forwarding rule.
     
-    The rule is immediately removed from iptables.
+    The rule is removed from iptables shortly after; changes made in quick
+    succession are synced together.
     
     Args:
         port: External port number of the rule to delete
@@ -141,7 +172,7 @@ def delete_rule(port: int):
 
 
 @router.post("/apply")
-def apply_network_changes():
+async def apply_network_changes():
     """
     Force re-application of all network rules.
     
@@ -155,7 +186,7 @@ def apply_network_changes():
         HTTPException: 500 on system error
     """
     try:
-        net_manager.apply_iptables()
+        await net_manager.aapply_iptables()
         return {"status": "applied"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
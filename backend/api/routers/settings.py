@@ -6,11 +6,12 @@ Endpoints for managing application configuration.
 
 from fastapi import APIRouter
 
-from backend.database import get_setting, set_setting
+from backend.api.responses import ORJSONResponse
+from backend.database import cached_get_setting, set_setting
 from backend.schemas import ConfigUpdate
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 DEFAULT_BACKUP_PATH = "/tmp/lxc_backups"
@@ -25,7 +26,7 @@ def get_config():
         dict: Current settings including backup_path
     """
     return {
-        "backup_path": get_setting("backup_path", DEFAULT_BACKUP_PATH)
+        "backup_path": cached_get_setting("backup_path", DEFAULT_BACKUP_PATH)
     }
 
 
@@ -2,7 +2,8 @@
 LXC Simple Manager - Container Adapter Layer
 
 Provides a unified interface for LXC container operations using a hybrid approach:
-- Native Python bindings (python3-lxc) for READ operations (list, get, status)
+- sysfs/procfs reads (cgroup v2) or one `lxc-ls --fancy` call for listing,
+  with native bindings as the last fallback
 - Shell commands for STATE-CHANGING operations (start, stop, create, delete)
 
 This hybrid approach is necessary because the native LXC Python bindings
@@ -11,12 +12,21 @@ The native bindings' start()/stop() methods fail silently when called from
 within an async context.
 """
 
-import datetime
+import asyncio
+import fcntl
+import logging
 import os
 import re
+import secrets
+import shlex
 import shutil
+import socket
 import subprocess
-from typing import Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 # Attempt to import native LXC bindings (used for read operations)
 try:
@@ -26,23 +36,667 @@ except ImportError:
     native_lxc = None
     USE_NATIVE = False
 
+logger = logging.getLogger(__name__)
+
+# Environment for commands whose output we parse: the C locale keeps
+# lxc-ls/lxc-info columns and messages stable. It is built once here;
+# proxies and HOME are kept for lxc-create's download template.
+_ENV = {**os.environ, "LANG": "C", "LC_ALL": "C"}
+
+
+def _resolve_lxc_path() -> str:
+    """Return the directory holding container configs and root filesystems."""
+    if USE_NATIVE:
+        path = getattr(native_lxc, "default_config_path", None)
+        if path:
+            return path
+    
+    # Honour a custom lxc.lxcpath from /etc/lxc/lxc.conf
+    try:
+        result = subprocess.run(
+            ["lxc-config", "lxc.lxcpath"],
+            capture_output=True, text=True, timeout=5, env=_ENV,
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return "/var/lib/lxc"
+
+
+# Resolved once at import: the LXC path does not change while we run
+LXC_PATH = _resolve_lxc_path()
+
+# Write the archive in 1 MiB records (2048 x 512-byte blocks) instead of
+# tar's default 10 KiB, cutting the number of write() calls on the
+# compressor pipe by ~100x for large root filesystems.
+TAR_BLOCKING_FACTOR = 2048
+
+# tar feeds the compressor through a pipe widened to one tar record, so a
+# full record is handed over per write instead of 64 KiB at a time.
+# F_SETPIPE_SZ is only exported by the fcntl module on Python 3.10+.
+BACKUP_PIPE_SIZE = 1 << 20
+F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+# Largest chunk handed to the HTTP layer per read when streaming a backup
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Backup compression -> (archive extension, media type)
+ARCHIVE_FORMATS = {
+    "zstd": ("tar.zst", "application/zstd"),
+    "gzip": ("tar.gz", "application/gzip"),
+}
+
+# External tools, resolved once at import by refresh_tools() so hot paths
+# never scan PATH. pzstd is preferred for zstd: it splits its output into
+# independent frames, so the archive can also be decompressed in parallel
+# (pzstd -d). Plain zstd -T0 still compresses on all cores; pigz does the
+# same for gzip.
+LXC_LS_PATH: Optional[str] = None
+PZSTD_PATH: Optional[str] = None
+ZSTD_PATH: Optional[str] = None
+PIGZ_PATH: Optional[str] = None
+ZSTD_PROGRAM: Optional[str] = None
+GZIP_PROGRAM: Optional[str] = None
+
+
+# Tools every state change shells out to; reported once if absent
+LXC_TOOLS = ("lxc-create", "lxc-destroy", "lxc-start", "lxc-stop", "lxc-info")
+
+
+def refresh_tools() -> None:
+    """Look the external tools up on PATH again (e.g. after installing one)."""
+    global LXC_LS_PATH, PZSTD_PATH, ZSTD_PATH, PIGZ_PATH, ZSTD_PROGRAM, GZIP_PROGRAM
+    
+    LXC_LS_PATH = shutil.which("lxc-ls")
+    PZSTD_PATH = shutil.which("pzstd")
+    ZSTD_PATH = shutil.which("zstd")
+    PIGZ_PATH = shutil.which("pigz")
+    
+    if PZSTD_PATH:
+        ZSTD_PROGRAM = f"{PZSTD_PATH} -q"
+    elif ZSTD_PATH:
+        ZSTD_PROGRAM = f"{ZSTD_PATH} -T0 -3 -q"
+    else:
+        ZSTD_PROGRAM = None
+    
+    GZIP_PROGRAM = PIGZ_PATH
+    
+    missing = [tool for tool in LXC_TOOLS if shutil.which(tool) is None]
+    if missing:
+        logger.warning("LXC tools not found on PATH: %s", ", ".join(missing))
+
+
+refresh_tools()
+
+# Prefix of the read-only rootfs snapshots taken for live backups; each
+# backup appends a random suffix so leftovers of a crashed run never clash
+SNAPSHOT_PREFIX = "lxc-manager-backup-"
+
+
+# How long a container listing is reused before LXC is queried again.
+# State changes made through the adapter invalidate it immediately.
+LIST_CACHE_TTL = 2.0
+
+# Threads fetching container details in a native listing. The pool is
+# shared by every listing so threads are not created per call.
+NATIVE_LIST_WORKERS = 16
+_NATIVE_POOL = ThreadPoolExecutor(max_workers=NATIVE_LIST_WORKERS, thread_name_prefix="lxc-list")
+
+
+class BackupConflictError(RuntimeError):
+    """A backup cannot be taken without stopping the container for its duration."""
+
+
+class ContainerRecord(NamedTuple):
+    """One container as reported by LXC."""
+    name: str
+    state: str
+    ipv4: Tuple[str, ...]
+    ipv6: Tuple[str, ...]
+    
+    def to_dict(self) -> Dict:
+        """Return the record in the API's ContainerInfo shape."""
+        return self._asdict()
+
+
+LXC_LS_FANCY_ARGS = ["--fancy", "--fancy-format", "NAME,STATE,IPV4,IPV6"]
+
+# lxc-ls --fancy pads its columns with runs of spaces
+_FANCY_SPLIT = re.compile(r" {2,}").split
+
+
+def _split_addresses(column: str) -> Tuple[str, ...]:
+    """Split an lxc-ls address column ("a, b" or "-") into a tuple."""
+    if column == "-":
+        return ()
+    return tuple(column.replace(" ", "").split(","))
+
+
+def _parse_fancy(output: str) -> List[ContainerRecord]:
+    """Parse `lxc-ls --fancy` output into container records."""
+    containers = []
+    lines = output.strip().split('\n')
+    
+    # Skip header line
+    for line in lines[1:]:
+        line = line.strip()
+        if not line:
+            continue
+        
+        parts = _FANCY_SPLIT(line)
+        
+        name = parts[0] if len(parts) > 0 else "Unknown"
+        state = parts[1] if len(parts) > 1 else "UNKNOWN"
+        
+        # Only a running container has addresses to report
+        if state != "RUNNING":
+            containers.append(ContainerRecord(name, state, (), ()))
+            continue
+        
+        ipv4 = _split_addresses(parts[2]) if len(parts) > 2 else ()
+        ipv6 = _split_addresses(parts[3]) if len(parts) > 3 else ()
+        
+        containers.append(ContainerRecord(name, state, ipv4, ipv6))
+    
+    return containers
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# On the unified (v2) hierarchy every running container has a
+# lxc.payload.<name> cgroup, which lets the listing read state from sysfs
+CGROUP_V2 = os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers"))
+
+# Config keys placing a container's cgroup somewhere else
+_CUSTOM_CGROUP_RE = re.compile(r"^\s*lxc\.cgroup\.(?:dir|relative)\b", re.M)
+
+# cgroup v1 reports "no limit" as a page-aligned LONG_MAX
+_CGROUP_V1_UNLIMITED = 1 << 62
+
+
+def _parse_usage_usec(data: bytes) -> Optional[int]:
+    for line in data.split(b"\n"):
+        if line.startswith(b"usage_usec"):
+            return int(line.split()[1])
+    return None
+
+
+def _parse_v2_limit(data: bytes) -> Optional[int]:
+    data = data.strip()
+    return None if data == b"max" else int(data)
+
+
+def _parse_v1_usage_ns(data: bytes) -> int:
+    return int(data) // 1000
+
+
+def _parse_v1_limit(data: bytes) -> Optional[int]:
+    value = int(data)
+    return None if value >= _CGROUP_V1_UNLIMITED else value
+
+
+# (stats key, path relative to the cgroup root, parser)
+_CGROUP_V2_FILES = (
+    ("cpu_usage", "lxc.payload.{}/cpu.stat", _parse_usage_usec),
+    ("memory_usage", "lxc.payload.{}/memory.current", int),
+    ("memory_limit", "lxc.payload.{}/memory.max", _parse_v2_limit),
+)
+_CGROUP_V1_FILES = (
+    ("cpu_usage", "cpuacct/lxc.payload.{}/cpuacct.usage", _parse_v1_usage_ns),
+    ("memory_usage", "memory/lxc.payload.{}/memory.usage_in_bytes", int),
+    ("memory_limit", "memory/lxc.payload.{}/memory.limit_in_bytes", _parse_v1_limit),
+)
+
+
+class _CgroupStats:
+    """
+    Open cgroup stat files per container, read with os.pread.
+    
+    The descriptors stay open between calls, so a poll costs one pread per
+    file instead of an open/read/close through Python's buffered IO. A
+    container's cgroup is recreated when it restarts, so drop() is called
+    on every state change and a failed read reopens the files once.
+    
+    The cgroup version is a property of the host, so the layout that
+    first yields files is remembered and the other one is never probed
+    again.
+    
+    Reads go through os.preadv into one preallocated buffer (reads are
+    serialized by the lock), so a poll allocates no read buffers.
+    """
+    
+    READ_SIZE = 512
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, List[tuple]] = {}
+        self._layout: Optional[tuple] = None
+        self._buffer = bytearray(self.READ_SIZE)
+        self._buffers = [self._buffer]
+    
+    def _pread(self, fd: int) -> bytearray:
+        """Read a whole (small) cgroup file from offset 0."""
+        n = os.preadv(fd, self._buffers, 0)
+        return self._buffer[:n]
+    
+    def _open(self, name: str) -> List[tuple]:
+        layouts = (self._layout,) if self._layout else (_CGROUP_V2_FILES, _CGROUP_V1_FILES)
+        for layout in layouts:
+            files = []
+            for key, path, parse in layout:
+                try:
+                    fd = os.open(os.path.join(CGROUP_ROOT, path.format(name)), os.O_RDONLY)
+                except OSError:
+                    continue
+                files.append((key, fd, parse))
+            if files:
+                self._layout = layout
+                return files
+        return []
+    
+    def _close(self, name: str) -> None:
+        for _, fd, _ in self._files.pop(name, ()):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+    
+    def read(self, name: str) -> Dict[str, Optional[int]]:
+        """
+        Read the CPU and memory counters of a running container.
+        
+        Returns:
+            Dict with whichever of cpu_usage (usec), memory_usage and
+            memory_limit could be read
+        """
+        with self._lock:
+            for _ in range(2):
+                files = self._files.get(name)
+                if files is None:
+                    files = self._open(name)
+                    if not files:
+                        return {}
+                    self._files[name] = files
+                
+                try:
+                    return {key: parse(self._pread(fd)) for key, fd, parse in files}
+                except OSError:
+                    # Stale descriptors from a previous cgroup; reopen
+                    self._close(name)
+            return {}
+    
+    def drop(self, name: str) -> None:
+        """Close the cached descriptors of a container."""
+        with self._lock:
+            self._close(name)
+
+
+class _ListCache:
+    """
+    Short-lived cache of the container list with a by-name index.
+    
+    The list and its index are published together as one immutable
+    snapshot (a tuple of ContainerRecords), so callers can share it
+    without defensive copies and never see a list and an index from
+    different refreshes.
+    
+    Refreshes run under the lock, so concurrent misses wait for a single
+    listing instead of each running their own (async callers share an
+    asyncio.Lock instead). invalidate() bumps a generation counter; a
+    refresh that overlapped an invalidation is returned to its caller but
+    not treated as fresh.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._alock: Optional[asyncio.Lock] = None
+        self._timestamp = 0.0
+        self._generation = 0
+        self._snapshot: Tuple[Tuple[ContainerRecord, ...], Dict[str, ContainerRecord]] = ((), {})
+    
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._timestamp < self.ttl
+    
+    def get(self, loader, force_refresh: bool = False) -> Tuple[ContainerRecord, ...]:
+        """Return the cached list, calling loader() to refresh it if stale."""
+        if not force_refresh and self._fresh():
+            return self._snapshot[0]
+        
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if not force_refresh and self._fresh():
+                return self._snapshot[0]
+            
+            generation = self._generation
+            return self._store(loader(), generation)
+    
+    async def aget(self, aloader, force_refresh: bool = False) -> Tuple[ContainerRecord, ...]:
+        """Async counterpart of get(); aloader() is awaited on a miss."""
+        if not force_refresh and self._fresh():
+            return self._snapshot[0]
+        
+        if self._alock is None:
+            self._alock = asyncio.Lock()
+        
+        async with self._alock:
+            if not force_refresh and self._fresh():
+                return self._snapshot[0]
+            
+            generation = self._generation
+            return self._store(await aloader(), generation)
+    
+    def _store(self, containers: List[ContainerRecord], generation: int) -> Tuple[ContainerRecord, ...]:
+        snapshot = tuple(containers)
+        self._snapshot = (snapshot, {c.name: c for c in snapshot})
+        self._timestamp = time.monotonic() if generation == self._generation else 0.0
+        return snapshot
+    
+    def peek(self, name: str) -> Tuple[bool, Optional[ContainerRecord]]:
+        """
+        Look a container up without refreshing.
+        
+        Returns:
+            (fresh, record): record is only meaningful when fresh is True
+        """
+        if not self._fresh():
+            return False, None
+        return True, self._snapshot[1].get(name)
+    
+    def invalidate(self) -> None:
+        """Force the next read to query LXC again."""
+        self._generation += 1
+        self._timestamp = 0.0
+
+
+def _procfs_ipv4(pid: int) -> Tuple[str, ...]:
+    """
+    Return the IPv4 addresses of a network namespace from procfs.
+    
+    /proc/<pid>/net/fib_trie is readable from the host, so unlike
+    get_ips() this does not enter the container. Local addresses are the
+    "/32 host LOCAL" leaves; loopback is skipped like get_ips() does.
+    """
+    addresses = {}
+    last = None
+    with open(f"/proc/{pid}/net/fib_trie") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("|-- "):
+                last = line[4:]
+            elif line == "/32 host LOCAL" and last and not last.startswith("127."):
+                addresses[last] = None
+    return tuple(addresses)
+
+
+def _procfs_ipv6(pid: int) -> Tuple[str, ...]:
+    """
+    Return the global IPv6 addresses of a network namespace from procfs.
+    
+    Mirrors get_ips(family="inet6"): loopback and scoped (link-local)
+    addresses are skipped.
+    """
+    addresses = []
+    with open(f"/proc/{pid}/net/if_inet6") as f:
+        for line in f:
+            address, _, _, scope, _, device = line.split()
+            if device == "lo" or scope != "00":
+                continue
+            addresses.append(socket.inet_ntop(socket.AF_INET6, bytes.fromhex(address)))
+    return tuple(addresses)
+
+
+# lxc-net's dnsmasq lease file: "<expiry> <mac> <ip> <hostname> <client-id>"
+DNSMASQ_LEASES_FILE = "/var/lib/misc/dnsmasq.lxcbr0.leases"
+_LEASE_RE = re.compile(r"^\d+\s+\S+\s+(\S+)\s+(\S+)", re.M)
+
+
+class _LeaseTable:
+    """
+    Hostname -> IPv4 map parsed from the dnsmasq lease file.
+    
+    The file is parsed in one regex sweep and only again once its mtime
+    changes. It is the last resort for a running container's IPv4 when
+    its procfs view cannot be read, before entering it with get_ips().
+    """
+    
+    def __init__(self, path: str = DNSMASQ_LEASES_FILE):
+        self.path = path
+        self._mtime = None
+        self._leases: Dict[str, str] = {}
+    
+    def get(self, name: str) -> Tuple[str, ...]:
+        """Return the leased IPv4 of a container as a 0/1-tuple."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return ()
+        
+        if mtime != self._mtime:
+            try:
+                with open(self.path) as f:
+                    data = f.read()
+            except OSError:
+                return ()
+            # dnsmasq uses "*" for clients that sent no hostname
+            self._leases = {
+                host: ip for ip, host in _LEASE_RE.findall(data)
+                if host != "*" and ":" not in ip
+            }
+            self._mtime = mtime
+        
+        ip = self._leases.get(name)
+        return (ip,) if ip else ()
+
+
+def _cgroup_pid(path: str) -> Optional[int]:
+    """Return any process in a cgroup tree, or None if the tree is empty."""
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(os.path.join(current, "cgroup.procs"), "rb") as f:
+                first = f.readline()
+            if first.strip():
+                return int(first)
+            
+            # v2 keeps processes in leaf cgroups (e.g. init.scope)
+            with os.scandir(current) as entries:
+                stack.extend(e.path for e in entries if e.is_dir(follow_symlinks=False))
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def _backup_format(name: str, compression: str) -> Tuple[str, str, str]:
+    """
+    Resolve the compression, filename and media type of a new backup.
+    
+    Args:
+        name: Container name
+        compression: "gzip" or "zstd"; zstd falls back to gzip when
+            neither pzstd nor zstd is installed
+    
+    Returns:
+        Tuple of (compression, filename, media type)
+    """
+    if compression != "zstd" or not ZSTD_PROGRAM:
+        compression = "gzip"
+    extension, media_type = ARCHIVE_FORMATS[compression]
+    timestamp = time.strftime("%Y-%m-%d_%H%M", time.localtime())
+    return compression, f"{name}_{timestamp}.{extension}", media_type
+
+
+def _tail_file(path: str, lines: int) -> str:
+    """
+    Return the last `lines` lines of a file, like `tail -n`.
+    
+    Reads backwards from the end in growing chunks until enough newlines
+    have been seen, so only the tail of a large log is read.
+    """
+    if lines <= 0:
+        return ""
+    
+    with open(path, "rb") as f:
+        start = os.fstat(f.fileno()).st_size
+        step = max(lines * 200, 4096)
+        data = b""
+        # One extra newline guarantees the oldest returned line is complete
+        while start > 0 and data.count(b"\n") <= lines:
+            step = min(step, start)
+            start -= step
+            f.seek(start)
+            data = f.read(step) + data
+            step *= 2
+    
+    tail = data.splitlines(keepends=True)[-lines:]
+    return b"".join(tail).decode("utf-8", errors="replace")
+
+
+# How long a measured rootfs size is served before it is measured again
+DISK_USAGE_TTL = 60.0
+
+
+def _tree_size(path: str) -> int:
+    """
+    Return the bytes allocated under a directory tree, like `du -sx`.
+    
+    Walks the tree in-process with os.scandir, summing st_blocks (so
+    sparse files count what they occupy). Hard-linked files are counted
+    once and other filesystems mounted inside the tree are skipped.
+    Unreadable entries are ignored.
+    """
+    root = os.lstat(path)
+    device = root.st_dev
+    total = root.st_blocks << 9
+    seen = set()
+    stack = [path]
+    
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if st.st_dev != device:
+                    continue
+                if st.st_nlink > 1 and not entry.is_dir(follow_symlinks=False):
+                    key = st.st_ino
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                total += st.st_blocks << 9
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+    
+    return total
+
+
+def _measure_disk_usage(path: str) -> Optional[int]:
+    """
+    Return the bytes used under a container rootfs, or None.
+    
+    A rootfs that is its own mount (ZFS dataset, LVM volume) is answered
+    by statvfs in O(1); anything else is walked with _tree_size().
+    """
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        if os.path.ismount(path):
+            st = os.statvfs(path)
+            return (st.f_blocks - st.f_bfree) * st.f_frsize
+        return _tree_size(path)
+    except Exception as e:
+        logger.debug("Could not measure %s: %s", path, e)
+    return None
+
+
+class _DiskUsageCache:
+    """
+    Rootfs sizes measured in the background (stale-while-revalidate).
+    
+    Walking a rootfs can take seconds, so get() never waits for it: it
+    returns the last known size (None before the first measurement) and,
+    if that value is older than the TTL, schedules a single re-measure.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, Tuple[float, int]] = {}
+        self._pending: set = set()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lxc-du")
+    
+    def get(self, name: str, path: str) -> Optional[int]:
+        """Return the cached size of a rootfs, refreshing it if stale."""
+        with self._lock:
+            cached = self._sizes.get(name)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+            
+            if name not in self._pending:
+                self._pending.add(name)
+                self._pool.submit(self._refresh, name, path)
+        
+        return cached[1] if cached is not None else None
+    
+    def _refresh(self, name: str, path: str) -> None:
+        try:
+            size = _measure_disk_usage(path)
+            if size is not None:
+                with self._lock:
+                    self._sizes[name] = (time.monotonic(), size)
+        finally:
+            with self._lock:
+                self._pending.discard(name)
+    
+    def drop(self, name: str) -> None:
+        """Forget the size of a container."""
+        with self._lock:
+            self._sizes.pop(name, None)
+
 
 class HybridLXCAdapter:
     """
     LXC adapter using a hybrid approach for maximum compatibility.
     
-    Uses native Python bindings for fast read operations (listing, status checks)
-    and shell commands for reliable state changes (start, stop, create, delete).
+    Lists containers from sysfs/procfs on cgroup v2 hosts, otherwise with
+    one `lxc-ls --fancy` call (falling back to native Python bindings when
+    lxc-ls is missing), and uses shell commands for reliable state changes
+    (start, stop, create, delete).
     
     This works around a known issue where native LXC bindings fail when
     called from within async event loops (FastAPI/uvicorn).
     """
     
-    def __init__(self):
+    def __init__(self, list_ttl: float = LIST_CACHE_TTL, disk_ttl: float = DISK_USAGE_TTL):
+        self._list_cache = _ListCache(list_ttl)
+        self._cgroup_stats = _CgroupStats()
+        self._disk_cache = _DiskUsageCache(disk_ttl)
+        self._leases = _LeaseTable()
+        
+        # Native Container handles, reused so liblxc parses each config once
+        self._handles: Dict[str, "native_lxc.Container"] = {}
+        self._handles_lock = threading.Lock()
+        
+        # Per-container locks serializing backups (snapshot, stop/restart)
+        self._backup_locks: Dict[str, threading.Lock] = {}
+        self._backup_locks_lock = threading.Lock()
+        
+        # Whether sysfs matches what LXC reports; None until first checked
+        self._fs_layout_ok: Optional[bool] = None
+        self._fs_layout_lock = threading.Lock()
+        
         if USE_NATIVE:
-            print("INFO: Using hybrid LXC adapter (native reads, shell commands for state changes)")
+            logger.info("Using hybrid LXC adapter (lxc-ls listing with native fallback, shell commands for state changes)")
         else:
-            print("INFO: Using shell-only LXC adapter (python3-lxc not available)")
+            logger.info("Using shell-only LXC adapter (python3-lxc not available)")
     
     def _run_command(self, cmd: List[str], check: bool = True) -> subprocess.CompletedProcess:
         """
@@ -58,114 +712,454 @@ class HybridLXCAdapter:
         Raises:
             RuntimeError: If command fails and check=True
         """
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = subprocess.run(cmd, capture_output=True, text=True, env=_ENV)
+        if check and result.returncode != 0:
+            error_msg = result.stderr.strip() or f"Command failed: {' '.join(cmd)}"
+            raise RuntimeError(error_msg)
+        return result
+    
+    def _run_command_quiet(self, cmd: List[str], check: bool = True) -> subprocess.CompletedProcess:
+        """
+        Execute a shell command whose stdout is not needed.
+        
+        stdout goes to /dev/null so only the (short) stderr is piped back
+        for error messages.
+        
+        Args:
+            cmd: Command and arguments
+            check: If True, raise exception on non-zero exit
+            
+        Returns:
+            CompletedProcess instance (stdout is None)
+            
+        Raises:
+            RuntimeError: If command fails and check=True
+        """
+        result = subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=_ENV
+        )
+        if check and result.returncode != 0:
+            error_msg = result.stderr.strip() or f"Command failed: {' '.join(cmd)}"
+            raise RuntimeError(error_msg)
+        return result
+    
+    async def _arun(
+        self,
+        cmd: List[str],
+        check: bool = True,
+        timeout: Optional[float] = None,
+        quiet: bool = False,
+    ) -> subprocess.CompletedProcess:
+        """
+        Execute a shell command without blocking the event loop.
+        
+        Args:
+            cmd: Command and arguments
+            check: If True, raise exception on non-zero exit
+            timeout: Seconds to wait before killing the command
+            quiet: Send stdout to /dev/null (like _run_command_quiet)
+            
+        Returns:
+            CompletedProcess instance
+            
+        Raises:
+            RuntimeError: If command fails and check=True
+            subprocess.TimeoutExpired: If the timeout elapses
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL if quiet else asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=_ENV,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        
+        result = subprocess.CompletedProcess(
+            cmd, proc.returncode,
+            None if quiet else stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+        )
         if check and result.returncode != 0:
             error_msg = result.stderr.strip() or f"Command failed: {' '.join(cmd)}"
             raise RuntimeError(error_msg)
         return result
     
+    def _get_handle(self, name: str) -> "native_lxc.Container":
+        """Return the shared native Container handle for a name."""
+        handle = self._handles.get(name)
+        if handle is None:
+            with self._handles_lock:
+                handle = self._handles.get(name)
+                if handle is None:
+                    handle = self._handles[name] = native_lxc.Container(name)
+        return handle
+    
+    def _backup_lock(self, name: str) -> threading.Lock:
+        """Return the lock serializing backups of a container."""
+        with self._backup_locks_lock:
+            return self._backup_locks.setdefault(name, threading.Lock())
+    
+    def _drop_handle(self, name: str) -> None:
+        """Forget a handle whose on-disk config was created or destroyed."""
+        with self._handles_lock:
+            self._handles.pop(name, None)
+    
     # =========================================================================
-    # Read Operations (use native bindings if available for speed)
+    # Read Operations
     # =========================================================================
     
-    def list_containers(self) -> List[Dict]:
+    def list_containers(self, force_refresh: bool = False) -> Tuple[ContainerRecord, ...]:
         """
         List all defined containers with their state and IP addresses.
         
-        Uses native bindings if available, falls back to shell parsing.
+        Results are cached for a short time and returned as an immutable
+        tuple shared by all callers.
+        
+        Args:
+            force_refresh: Bypass the cache and query LXC
+        """
+        return self._list_cache.get(self._load_containers, force_refresh)
+    
+    async def alist_containers(self, force_refresh: bool = False) -> Tuple[ContainerRecord, ...]:
+        """Async counterpart of list_containers() for use from the event loop."""
+        return await self._list_cache.aget(self._aload_containers, force_refresh)
+    
+    def _load_containers(self) -> List[ContainerRecord]:
+        """
+        Query LXC for the current container list.
+        
+        On a cgroup v2 host (with the layout LXC confirmed, see
+        _fs_layout_matches) the list is read straight from LXC_PATH,
+        sysfs and procfs without spawning anything. Otherwise one
+        `lxc-ls --fancy` call reports every container's state and
+        addresses in a single pass. The native bindings need several
+        liblxc round trips per container, so they are only used when
+        lxc-ls is not installed.
         """
+        containers = self._list_containers_fs()
+        if containers is not None:
+            return containers
+        if LXC_LS_PATH:
+            return self._list_containers_shell()
         if USE_NATIVE:
             return self._list_containers_native()
-        return self._list_containers_shell()
+        return []
+    
+    async def _aload_containers(self) -> List[ContainerRecord]:
+        """Async counterpart of _load_containers()."""
+        # Scans LXC_PATH and parses procfs per container: keep it off the loop
+        containers = await asyncio.to_thread(self._list_containers_fs)
+        if containers is not None:
+            return containers
+        if LXC_LS_PATH:
+            try:
+                result = await self._arun([LXC_LS_PATH, *LXC_LS_FANCY_ARGS], check=False)
+                return _parse_fancy(result.stdout) if result.returncode == 0 else []
+            except Exception as e:
+                logger.error("Shell parse error: %s", e)
+                return []
+        if USE_NATIVE:
+            return await asyncio.to_thread(self._list_containers_native)
+        return []
+    
+    def _list_containers_fs(self) -> Optional[List[ContainerRecord]]:
+        """
+        List containers from the filesystem, or None if that is not possible.
+        
+        Names are the directories under LXC_PATH holding a config file;
+        each is described by _fs_record(). None is also returned when any
+        of them cannot be, so the caller asks LXC instead.
+        """
+        if not self._fs_layout_matches():
+            return None
+        
+        try:
+            with os.scandir(LXC_PATH) as entries:
+                names = sorted(
+                    e.name for e in entries
+                    if e.is_dir() and os.path.isfile(os.path.join(e.path, "config"))
+                )
+        except OSError as e:
+            logger.debug("Cannot enumerate %s: %s", LXC_PATH, e)
+            return None
+        
+        containers = []
+        for name in names:
+            record = self._fs_record(name)
+            if record is None:
+                return None
+            containers.append(record)
+        return containers
+    
+    def _fs_lookup(self, name: str) -> Optional[ContainerRecord]:
+        """One container's record from sysfs/procfs, or None to ask LXC."""
+        if not self._fs_layout_matches():
+            return None
+        return self._fs_record(name)
+    
+    def _fs_layout_matches(self) -> bool:
+        """
+        Whether container state can be read from sysfs on this host.
+        
+        Needs cgroup v2, and is checked once against lxc-ls (or the native
+        bindings): if any container's state differs, e.g. because its
+        cgroup lives under user.slice or a systemd-nested tree rather than
+        CGROUP_ROOT/lxc.payload.<name>, sysfs is not used again.
+        """
+        if not CGROUP_V2:
+            return False
+        
+        with self._fs_layout_lock:
+            if self._fs_layout_ok is None:
+                if LXC_LS_PATH:
+                    expected = self._list_containers_shell()
+                elif USE_NATIVE:
+                    expected = self._list_containers_native()
+                else:
+                    expected = []
+                
+                self._fs_layout_ok = True
+                for container in expected:
+                    record = self._fs_record(container.name)
+                    if record is not None and record.state != container.state:
+                        logger.warning(
+                            "'%s' is %s but its sysfs state is %s; listing containers through LXC",
+                            container.name, container.state, record.state,
+                        )
+                        self._fs_layout_ok = False
+                        break
+            return self._fs_layout_ok
+    
+    def _fs_record(self, name: str) -> Optional[ContainerRecord]:
+        """
+        Build one container's record from sysfs/procfs (cgroup v2 only).
+        
+        The container is running while its lxc.payload.<name> cgroup
+        exists (FROZEN when that cgroup is frozen); its addresses are read
+        from the procfs view of any process in that cgroup. None means
+        the cgroup is missing but the config places it elsewhere, so the
+        container may well be running.
+        """
+        cgroup = os.path.join(CGROUP_ROOT, f"lxc.payload.{name}")
+        try:
+            with open(os.path.join(cgroup, "cgroup.freeze"), "rb") as f:
+                frozen = f.read(1) == b"1"
+        except OSError:
+            if self._custom_cgroup(name):
+                return None
+            return ContainerRecord(name, "STOPPED", (), ())
+        
+        if frozen:
+            return ContainerRecord(name, "FROZEN", (), ())
+        
+        pid = _cgroup_pid(cgroup)
+        if pid is not None:
+            try:
+                return ContainerRecord(name, "RUNNING", _procfs_ipv4(pid), _procfs_ipv6(pid))
+            except (OSError, ValueError):
+                pass  # Process exited between the reads, or procfs is hidden
+        return ContainerRecord(name, "RUNNING", self._leases.get(name), ())
     
-    def _list_containers_native(self) -> List[Dict]:
-        """List containers using native Python bindings."""
-        results = []
+    def _custom_cgroup(self, name: str) -> bool:
+        """Whether a container's config sets lxc.cgroup.dir/relative."""
+        try:
+            with open(os.path.join(LXC_PATH, name, "config"), "r") as f:
+                return _CUSTOM_CGROUP_RE.search(f.read()) is not None
+        except OSError:
+            return False
+    
+    def _list_containers_native(self) -> List[ContainerRecord]:
+        """
+        List containers using native Python bindings.
+        
+        Each container's state and IPs are fetched on a thread pool:
+        get_ips() enters the container and liblxc releases the GIL while
+        it waits, so the listing takes about as long as the slowest
+        container instead of the sum of all of them.
+        """
         try:
             names = native_lxc.list_containers()
-            for name in names:
-                container = native_lxc.Container(name)
-                results.append({
-                    "name": name,
-                    "state": container.state,
-                    "ipv4": container.get_ips(family="inet") or [],
-                    "ipv6": container.get_ips(family="inet6") or [],
-                })
+            
+            # Release handles of containers removed outside this process
+            with self._handles_lock:
+                for stale in self._handles.keys() - set(names):
+                    del self._handles[stale]
+            
+            return list(_NATIVE_POOL.map(self._fetch_native, names))
         except Exception as e:
-            print(f"ERROR: Failed to list containers: {e}")
-        return results
-    
-    def _list_containers_shell(self) -> List[Dict]:
-        """List containers using lxc-ls command."""
-        if not shutil.which("lxc-ls"):
+            logger.error("Failed to list containers: %s", e)
             return []
+    
+    def _fetch_native(self, name: str) -> ContainerRecord:
+        """
+        Read one container's state and addresses through liblxc.
         
+        Addresses of a running container are read from its init process's
+        procfs view; get_ips(), which enters the container, is only the
+        fallback after the dnsmasq leases. A container that cannot be
+        queried is reported as UNKNOWN rather than failing the whole
+        listing.
+        """
         try:
-            result = self._run_command(
-                ["lxc-ls", "--fancy", "--fancy-format", "NAME,STATE,IPV4,IPV6"],
-                check=False
+            container = self._get_handle(name)
+            state = container.state
+            
+            # Only a running container has addresses to report
+            if state != "RUNNING":
+                return ContainerRecord(name, state, (), ())
+            
+            pid = container.init_pid
+            if pid > 0:
+                try:
+                    return ContainerRecord(name, state, _procfs_ipv4(pid), _procfs_ipv6(pid))
+                except (OSError, ValueError):
+                    pass  # Process gone or unexpected format; try the leases
+            
+            leased = self._leases.get(name)
+            if leased:
+                return ContainerRecord(name, state, leased, ())
+            
+            return ContainerRecord(
+                name,
+                state,
+                tuple(container.get_ips(family="inet") or ()),
+                tuple(container.get_ips(family="inet6") or ()),
             )
+        except Exception as e:
+            logger.warning("Failed to query container '%s': %s", name, e)
+            return ContainerRecord(name, "UNKNOWN", (), ())
+    
+    def _list_containers_shell(self) -> List[ContainerRecord]:
+        """List containers using lxc-ls command."""
+        try:
+            # The resolved path spares the child a PATH search on every exec
+            result = self._run_command([LXC_LS_PATH, *LXC_LS_FANCY_ARGS], check=False)
             if result.returncode != 0:
                 return []
             
-            containers = []
-            lines = result.stdout.strip().split('\n')
-            
-            # Skip header line
-            for line in lines[1:]:
-                if not line.strip():
-                    continue
-                
-                parts = re.split(r'\s{2,}', line.strip())
-                
-                name = parts[0] if len(parts) > 0 else "Unknown"
-                state = parts[1] if len(parts) > 1 else "UNKNOWN"
-                ipv4_str = parts[2] if len(parts) > 2 else "-"
-                ipv6_str = parts[3] if len(parts) > 3 else "-"
-                
-                ipv4 = [] if ipv4_str == "-" else [x.strip() for x in ipv4_str.split(',')]
-                ipv6 = [] if ipv6_str == "-" else [x.strip() for x in ipv6_str.split(',')]
-                
-                containers.append({
-                    "name": name,
-                    "state": state,
-                    "ipv4": ipv4,
-                    "ipv6": ipv6,
-                })
-            
-            return containers
+            return _parse_fancy(result.stdout)
         except Exception as e:
-            print(f"ERROR: Shell parse error: {e}")
+            logger.error("Shell parse error: %s", e)
             return []
     
-    def get_container(self, name: str) -> Optional[Dict]:
+    def get_container(self, name: str, force_refresh: bool = False) -> Optional[ContainerRecord]:
         """
         Get information about a specific container.
         
+        Served from the cached container list while it is fresh. On a
+        miss only this container is queried instead of re-listing all of
+        them; unknown names are rejected by _is_defined() up front.
+        
         Args:
             name: Container name
+            force_refresh: Bypass the cache and query LXC
             
         Returns:
-            Container info dict or None if not found
+            ContainerRecord or None if not found
         """
+        if not self._is_defined(name):
+            return None
+        
+        if not force_refresh:
+            fresh, record = self._list_cache.peek(name)
+            if fresh:
+                return record
+        
+        record = self._fs_lookup(name)
+        if record is not None:
+            return record
         if USE_NATIVE:
-            try:
-                container = native_lxc.Container(name)
-                if not container.defined:
-                    return None
-                return {
-                    "name": container.name,
-                    "state": container.state,
-                    "ipv4": container.get_ips(family="inet") or [],
-                    "ipv6": container.get_ips(family="inet6") or [],
-                }
-            except Exception:
-                return None
-        else:
-            for container in self.list_containers():
-                if container["name"] == name:
-                    return container
+            return self._fetch_native(name)
+        return self._parse_info(name, self._run_command(self._info_command(name), check=False))
+    
+    async def aget_container(self, name: str, force_refresh: bool = False) -> Optional[ContainerRecord]:
+        """Async counterpart of get_container()."""
+        if not self._is_defined(name):
+            return None
+        
+        if not force_refresh:
+            fresh, record = self._list_cache.peek(name)
+            if fresh:
+                return record
+        
+        if CGROUP_V2:
+            record = await asyncio.to_thread(self._fs_lookup, name)
+            if record is not None:
+                return record
+        if USE_NATIVE:
+            return await asyncio.to_thread(self._fetch_native, name)
+        return self._parse_info(name, await self._arun(self._info_command(name), check=False))
+    
+    def _info_command(self, name: str) -> List[str]:
+        """lxc-info invocation printing one container's state, then its IPs."""
+        return ["lxc-info", "-n", name, "-s", "-i", "-H"]
+    
+    def _parse_info(self, name: str, result: subprocess.CompletedProcess) -> Optional[ContainerRecord]:
+        """Build a record from _info_command() output, or None on failure."""
+        if result.returncode != 0:
+            return None
+        
+        lines = result.stdout.split()
+        if not lines:
+            return None
+        
+        state = lines[0]
+        if state != "RUNNING":
+            return ContainerRecord(name, state, (), ())
+        
+        addresses = lines[1:]
+        return ContainerRecord(
+            name,
+            state,
+            tuple(a for a in addresses if ":" not in a),
+            tuple(a for a in addresses if ":" in a),
+        )
+    
+    def _is_defined(self, name: str) -> bool:
+        """
+        Check whether a container exists with a single stat().
+        
+        A container is defined by its config file under LXC_PATH, so this
+        answers without asking liblxc or running a command.
+        """
+        return os.path.isfile(os.path.join(LXC_PATH, name, "config"))
+    
+    def _probe_state(self, name: str) -> Optional[str]:
+        """
+        Return the current state of one container, or None if undefined.
+        
+        Cheaper than get_container(force_refresh=True) for state changes:
+        it queries a single container and never resolves IP addresses.
+        """
+        if not self._is_defined(name):
+            return None
+        
+        if USE_NATIVE:
+            container = self._get_handle(name)
+            return container.state if container.defined else None
+        
+        result = self._run_command(["lxc-info", "-n", name, "-s", "-H"], check=False)
+        if result.returncode != 0:
             return None
+        return result.stdout.strip() or None
+    
+    async def _aprobe_state(self, name: str) -> Optional[str]:
+        """Async counterpart of _probe_state()."""
+        if not self._is_defined(name):
+            return None
+        
+        if USE_NATIVE:
+            return await asyncio.to_thread(self._probe_state, name)
+        
+        result = await self._arun(["lxc-info", "-n", name, "-s", "-H"], check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip() or None
     
     # =========================================================================
     # State-Changing Operations (use shell commands for async compatibility)
@@ -185,14 +1179,18 @@ class HybridLXCAdapter:
             RuntimeError: If start fails
         """
         # Check if container exists and current state
-        container = self.get_container(name)
-        if not container:
+        state = self._probe_state(name)
+        if state is None:
             raise ValueError(f"Container '{name}' does not exist")
         
-        if container["state"] == "RUNNING":
+        if state == "RUNNING":
             return  # Already running
         
-        self._run_command(["lxc-start", "-n", name])
+        try:
+            self._run_command_quiet(["lxc-start", "-n", name])
+        finally:
+            self._list_cache.invalidate()
+            self._cgroup_stats.drop(name)
     
     def stop_container(self, name: str) -> None:
         """
@@ -207,14 +1205,53 @@ class HybridLXCAdapter:
             ValueError: If container doesn't exist
             RuntimeError: If stop fails
         """
-        container = self.get_container(name)
-        if not container:
+        state = self._probe_state(name)
+        if state is None:
+            raise ValueError(f"Container '{name}' does not exist")
+        
+        if state != "RUNNING":
+            return  # Already stopped
+        
+        try:
+            self._run_command_quiet(["lxc-stop", "-n", name])
+        finally:
+            self._list_cache.invalidate()
+            self._cgroup_stats.drop(name)
+    
+    async def astart_container(self, name: str) -> None:
+        """
+        Async counterpart of start_container().
+        
+        lxc-start runs as an asyncio subprocess, so many containers can be
+        started concurrently with asyncio.gather().
+        """
+        state = await self._aprobe_state(name)
+        if state is None:
+            raise ValueError(f"Container '{name}' does not exist")
+        
+        if state == "RUNNING":
+            return  # Already running
+        
+        try:
+            await self._arun(["lxc-start", "-n", name], quiet=True)
+        finally:
+            self._list_cache.invalidate()
+            self._cgroup_stats.drop(name)
+    
+    async def astop_container(self, name: str) -> None:
+        """Async counterpart of stop_container()."""
+        state = await self._aprobe_state(name)
+        if state is None:
             raise ValueError(f"Container '{name}' does not exist")
         
-        if container["state"] != "RUNNING":
+        if state != "RUNNING":
             return  # Already stopped
         
-        self._run_command(["lxc-stop", "-n", name])
+        try:
+            await self._arun(["lxc-stop", "-n", name], quiet=True)
+        finally:
+            self._list_cache.invalidate()
+            self._cgroup_stats.drop(name)
     
     def create_container(self, name: str, distro: str, release: str, arch: str = "amd64") -> None:
         """
@@ -230,13 +1267,17 @@ class HybridLXCAdapter:
             ValueError: If container already exists
             RuntimeError: If creation fails
         """
-        if self.get_container(name):
+        if self._is_defined(name):
             raise ValueError(f"Container '{name}' already exists")
         
-        self._run_command([
-            "lxc-create", "-n", name, "-t", "download",
-            "--", "--dist", distro, "--release", release, "--arch", arch
-        ])
+        try:
+            self._run_command_quiet([
+                "lxc-create", "-n", name, "-t", "download",
+                "--", "--dist", distro, "--release", release, "--arch", arch
+            ])
+        finally:
+            self._list_cache.invalidate()
+            self._drop_handle(name)
         
         # Start the container after creation
         self.start_container(name)
@@ -251,29 +1292,40 @@ class HybridLXCAdapter:
         Raises:
             RuntimeError: If deletion fails
         """
-        container = self.get_container(name)
-        if not container:
+        state = self._probe_state(name)
+        if state is None:
             raise ValueError(f"Container '{name}' does not exist")
         
         # Stop if running
-        if container["state"] == "RUNNING":
+        if state == "RUNNING":
             try:
                 self.stop_container(name)
             except Exception:
                 pass  # Continue with destroy anyway
         
-        self._run_command(["lxc-destroy", "-n", name])
+        try:
+            self._run_command_quiet(["lxc-destroy", "-n", name])
+        finally:
+            self._list_cache.invalidate()
+            self._cgroup_stats.drop(name)
+            self._disk_cache.drop(name)
+            self._drop_handle(name)
     
-    def backup_container(self, name: str, backup_dir: str) -> str:
+    def backup_container(self, name: str, backup_dir: str, compression: str = "gzip") -> str:
         """
         Create a compressed tarball backup of a container.
         
-        The container is stopped during backup to ensure consistency,
-        then restarted if it was running.
+        A running container whose rootfs is a btrfs subvolume or a ZFS
+        dataset stays up: it is frozen just long enough to take a
+        read-only snapshot, and the snapshot is archived. Otherwise the
+        container is stopped during backup to ensure consistency, then
+        restarted.
         
         Args:
             name: Container name
             backup_dir: Directory to store the backup
+            compression: "gzip" (.tar.gz) or "zstd" (.tar.zst); zstd falls
+                back to gzip when neither pzstd nor zstd is installed
             
         Returns:
             Filename of the created backup
@@ -282,36 +1334,434 @@ class HybridLXCAdapter:
             ValueError: If container doesn't exist
             RuntimeError: If backup fails
         """
-        container = self.get_container(name)
-        if not container:
+        state = self._probe_state(name)
+        if state is None:
             raise ValueError(f"Container '{name}' not found")
         
         os.makedirs(backup_dir, exist_ok=True)
         
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M")
-        filename = f"{name}_{timestamp}.tar.gz"
+        compression, filename, _ = _backup_format(name, compression)
         filepath = os.path.join(backup_dir, filename)
         
-        was_running = container["state"] == "RUNNING"
+        with self._backup_lock(name):
+            # Another backup may have stopped or restarted it meanwhile
+            was_running = self._probe_state(name) == "RUNNING"
+            
+            if was_running:
+                with self._rootfs_snapshot(name) as snapshot:
+                    if snapshot:
+                        logger.info("Creating live backup at %s...", filepath)
+                        self._write_archive(name, filepath, compression, rootfs=snapshot)
+                        return filename
+            
+            try:
+                if was_running:
+                    logger.info("Stopping '%s' for backup...", name)
+                    self.stop_container(name)
+                
+                logger.info("Creating backup at %s...", filepath)
+                self._write_archive(name, filepath, compression)
+                return filename
+                
+            finally:
+                if was_running:
+                    logger.info("Restarting '%s'...", name)
+                    self.start_container(name)
+    
+    def stream_backup(
+        self, name: str, compression: str = "gzip"
+    ) -> Tuple[str, str, Iterator[bytes]]:
+        """
+        Stream a compressed backup of a container without touching disk.
+        
+        The archive is produced the same way as backup_container(), but the
+        compressor writes to a pipe that the caller drains chunk by chunk.
+        Since a slow client decides how long the stream lasts, a running
+        container is never stopped for it: it must be snapshotted (see
+        _rootfs_snapshot) or the backup is refused.
+        
+        The snapshot is taken before returning. The caller must exhaust
+        or close the iterator to release it and the container's backup
+        lock.
+        
+        Args:
+            name: Container name
+            compression: "gzip" or "zstd"
+            
+        Returns:
+            Tuple of (suggested filename, media type, iterator of archive chunks)
+            
+        Raises:
+            ValueError: If container doesn't exist
+            BackupConflictError: If the container is neither stopped nor
+                snapshottable
+        """
+        compression, filename, media_type = _backup_format(name, compression)
+        chunks = self._stream_archive(name, compression)
+        # Run up to the first chunk: lock, state check and snapshot
+        next(chunks)
+        return filename, media_type, chunks
+    
+    def _stream_archive(self, name: str, compression: str) -> Iterator[bytes]:
+        """
+        Generator behind stream_backup().
+        
+        Yields an empty chunk once the backup is ready to be read.
+        
+        Args:
+            name: Container name
+            compression: "gzip" or "zstd"
+            
+        Yields:
+            Chunks of the compressed archive
+            
+        Raises:
+            ValueError: If container doesn't exist
+            BackupConflictError: If the container is neither stopped nor
+                snapshottable
+            subprocess.CalledProcessError: If tar or the compressor fails
+        """
+        with self._backup_lock(name):
+            state = self._probe_state(name)
+            if state is None:
+                raise ValueError(f"Container '{name}' not found")
+            
+            if state == "STOPPED":
+                yield b""
+                logger.info("Streaming backup of '%s'...", name)
+                yield from self._read_archive(name, compression)
+                return
+            
+            if state != "RUNNING":
+                raise BackupConflictError(f"Container '{name}' is {state}; retry once it settles")
+            
+            with self._rootfs_snapshot(name) as snapshot:
+                if not snapshot:
+                    raise BackupConflictError(
+                        f"Container '{name}' cannot be snapshotted; stop it or use a stored backup"
+                    )
+                yield b""
+                logger.info("Streaming live backup of '%s'...", name)
+                yield from self._read_archive(name, compression, rootfs=snapshot)
+    
+    def _read_archive(
+        self,
+        name: str,
+        compression: str = "gzip",
+        rootfs: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        """
+        Yield the output of `tar | compressor` as it is produced.
+        
+        If the consumer stops early both processes are killed.
         
+        Args:
+            name: Container name
+            compression: "gzip" or "zstd"
+            rootfs: Snapshot to archive in place of the live rootfs
+            
+        Yields:
+            Chunks of at most STREAM_CHUNK_SIZE bytes
+            
+        Raises:
+            subprocess.CalledProcessError: If tar or the compressor fails
+        """
+        tar, compressor = self._spawn_archive(name, subprocess.PIPE, compression, rootfs)
+        finished = False
         try:
-            if was_running:
-                print(f"INFO: Stopping '{name}' for backup...")
-                self.stop_container(name)
+            read = compressor.stdout.read1
+            while True:
+                chunk = read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+            finished = True
+        finally:
+            if not finished:
+                compressor.kill()
+                tar.kill()
+            compressor.stdout.close()
+            compress_rc = compressor.wait()
+            tar_rc = tar.wait()
+        
+        if tar_rc != 0:
+            raise subprocess.CalledProcessError(tar_rc, tar.args)
+        if compress_rc != 0:
+            raise subprocess.CalledProcessError(compress_rc, compressor.args)
+    
+    @contextmanager
+    def _rootfs_snapshot(self, name: str) -> Iterator[Optional[str]]:
+        """
+        Take a point-in-time copy of a running container's rootfs.
+        
+        O(1) snapshots are tried first for the rootfs filesystem: a btrfs
+        read-only snapshot, or a ZFS snapshot of a dataset mounted at the
+        rootfs; the container is frozen only while one is taken. Failing
+        that, on btrfs/XFS the container is stopped for a reflink copy
+        (`cp --reflink=always` shares data blocks but still creates every
+        inode, too long to stay frozen) and restarted before archiving.
+        Each copy gets a fresh SNAPSHOT_PREFIX name and is removed when
+        the context exits; callers hold the container's backup lock.
+        
+        Args:
+            name: Container name
             
-            print(f"INFO: Creating backup at {filepath}...")
-            subprocess.run(
-                ["tar", "-czf", filepath, "-C", "/var/lib/lxc", name],
-                check=True
+        Yields:
+            Path of the copy, or None if the rootfs cannot be snapshotted
+            (plain ext4 directory, overlay, failed freeze...)
+        """
+        rootfs = os.path.join(LXC_PATH, name, "rootfs")
+        result = self._run_command(
+            ["findmnt", "-n", "-r", "-T", rootfs, "-o", "FSTYPE,SOURCE,TARGET"],
+            check=False
+        )
+        fields = result.stdout.split() if result.returncode == 0 else []
+        fstype = fields[0] if fields else None
+        
+        snapshot_name = SNAPSHOT_PREFIX + secrets.token_hex(4)
+        local = os.path.join(LXC_PATH, name, snapshot_name)
+        
+        # (snapshot path, create command, remove command)
+        snapshots = []
+        if fstype == "btrfs":
+            snapshots.append((
+                local,
+                ["btrfs", "subvolume", "snapshot", "-r", rootfs, local],
+                ["btrfs", "subvolume", "delete", local],
+            ))
+        elif fstype == "zfs" and len(fields) == 3 and fields[2] == rootfs:
+            snap = f"{fields[1]}@{snapshot_name}"
+            snapshots.append((
+                os.path.join(rootfs, ".zfs", "snapshot", snapshot_name),
+                ["zfs", "snapshot", snap],
+                ["zfs", "destroy", snap],
+            ))
+        
+        reflink = None
+        if fstype in ("btrfs", "xfs"):
+            reflink = (
+                local,
+                ["cp", "-a", "--reflink=always", rootfs, local],
+                ["rm", "-rf", "--one-file-system", local],
             )
-            return filename
+        
+        taken = None
+        if snapshots:
+            taken = self._frozen_snapshot(name, snapshots)
+        if taken is None and reflink is not None:
+            taken = self._stopped_copy(name, reflink)
+        
+        if taken is None:
+            if snapshots or reflink:
+                logger.warning("Live snapshot of '%s' failed", name)
+            yield None
+            return
+        
+        try:
+            yield taken[0]
+        finally:
+            self._run_command_quiet(taken[1], check=False)
+    
+    def _frozen_snapshot(
+        self, name: str, strategies: List[Tuple[str, List[str], List[str]]]
+    ) -> Optional[Tuple[str, List[str]]]:
+        """
+        Freeze a container and take the first snapshot that succeeds.
+        
+        Args:
+            name: Container name
+            strategies: (snapshot path, create command, remove command)
+            
+        Returns:
+            (snapshot path, remove command), or None if none was taken
+        """
+        taken = None
+        try:
+            self._run_command_quiet(["lxc-freeze", "-n", name])
+            try:
+                for path, create, remove in strategies:
+                    try:
+                        self._run_command_quiet(create)
+                    except (RuntimeError, OSError) as e:
+                        logger.debug("Snapshot of '%s' via %s failed: %s", name, create[0], e)
+                        self._run_command_quiet(remove, check=False)
+                        continue
+                    taken = (path, remove)
+                    break
+            finally:
+                self._run_command_quiet(["lxc-unfreeze", "-n", name])
+        except (RuntimeError, OSError) as e:
+            logger.warning("Could not freeze '%s' for a live snapshot: %s", name, e)
+            if taken:
+                self._run_command_quiet(taken[1], check=False)
+            return None
+        return taken
+    
+    def _stopped_copy(
+        self, name: str, strategy: Tuple[str, List[str], List[str]]
+    ) -> Optional[Tuple[str, List[str]]]:
+        """
+        Stop a container, copy its rootfs and start it again.
+        
+        Args:
+            name: Container name
+            strategy: (copy path, create command, remove command)
             
+        Returns:
+            (copy path, remove command), or None if the copy failed
+            
+        Raises:
+            RuntimeError: If the container cannot be restarted
+        """
+        path, create, remove = strategy
+        try:
+            logger.info("Stopping '%s' for a reflink copy...", name)
+            self.stop_container(name)
+        except (RuntimeError, OSError) as e:
+            logger.warning("Could not stop '%s' for a reflink copy: %s", name, e)
+            return None
+        
+        copied = False
+        try:
+            self._run_command_quiet(create)
+            copied = True
+        except (RuntimeError, OSError) as e:
+            logger.debug("Reflink copy of '%s' failed: %s", name, e)
         finally:
-            if was_running:
-                print(f"INFO: Restarting '{name}'...")
+            try:
+                logger.info("Restarting '%s'...", name)
                 self.start_container(name)
-
-
+            except BaseException:
+                self._run_command_quiet(remove, check=False)
+                raise
+        
+        if not copied:
+            self._run_command_quiet(remove, check=False)
+            return None
+        return path, remove
+    
+    def _write_archive(
+        self,
+        name: str,
+        filepath: str,
+        compression: str = "gzip",
+        rootfs: Optional[str] = None,
+    ) -> None:
+        """
+        Run `tar | compressor > filepath` for a container.
+        
+        The partial archive is removed if either stage fails.
+        
+        Args:
+            name: Container name
+            filepath: Destination archive path
+            compression: "gzip" or "zstd"
+            rootfs: Snapshot to archive in place of the live rootfs
+            
+        Raises:
+            subprocess.CalledProcessError: If tar or the compressor fails
+        """
+        with open(filepath, "wb") as out:
+            tar, compressor = self._spawn_archive(name, out, compression, rootfs)
+            compress_rc = compressor.wait()
+            tar_rc = tar.wait()
+        
+        if tar_rc != 0 or compress_rc != 0:
+            try:
+                os.unlink(filepath)
+            except OSError:
+                pass
+            if tar_rc != 0:
+                raise subprocess.CalledProcessError(tar_rc, tar.args)
+            raise subprocess.CalledProcessError(compress_rc, compressor.args)
+    
+    def _spawn_archive(
+        self,
+        name: str,
+        stdout,
+        compression: str = "gzip",
+        rootfs: Optional[str] = None,
+    ) -> Tuple[subprocess.Popen, subprocess.Popen]:
+        """
+        Start the `tar | compressor` pipeline for a container.
+        
+        Args:
+            name: Container name
+            stdout: File object or subprocess.PIPE for the compressor output
+            compression: "gzip" or "zstd"
+            rootfs: Snapshot to archive in place of the live rootfs
+            
+        Returns:
+            The (tar, compressor) processes; the caller must wait on both
+        """
+        tar_cmd = self._archive_command(name, rootfs)
+        compress_cmd = self._compress_command(compression)
+        
+        tar = subprocess.Popen(tar_cmd, stdout=subprocess.PIPE)
+        try:
+            try:
+                fcntl.fcntl(tar.stdout.fileno(), F_SETPIPE_SZ, BACKUP_PIPE_SIZE)
+            except OSError:
+                pass  # Above fs.pipe-max-size; keep the default size
+            compressor = subprocess.Popen(compress_cmd, stdin=tar.stdout, stdout=stdout)
+        except BaseException:
+            tar.kill()
+            tar.wait()
+            raise
+        finally:
+            # The compressor holds its own copy of the read end
+            tar.stdout.close()
+        
+        return tar, compressor
+    
+    def _compress_command(self, compression: str = "gzip") -> List[str]:
+        """
+        Build the compressor command reading stdin and writing stdout.
+        
+        Args:
+            compression: "gzip" or "zstd"
+            
+        Returns:
+            Command and arguments
+        """
+        if compression == "zstd":
+            program = ZSTD_PROGRAM
+        else:
+            program = GZIP_PROGRAM or "gzip"
+        return [*shlex.split(program), "-c"]
+    
+    def _archive_command(self, name: str, rootfs: Optional[str] = None) -> List[str]:
+        """
+        Build the tar command that writes a container directory to stdout.
+        
+        Args:
+            name: Container name (directory under LXC_PATH)
+            rootfs: Snapshot to archive in place of the live rootfs; its
+                members are stored as name/rootfs/... as usual
+            
+        Returns:
+            Command and arguments
+        """
+        cmd = [
+            "tar", "-cf", "-", "--sparse",
+            "--blocking-factor", str(TAR_BLOCKING_FACTOR),
+        ]
+        if rootfs is None:
+            return cmd + ["-C", LXC_PATH, name]
+        
+        parent, snapshot = os.path.split(rootfs)
+        return cmd + [
+            "--anchored",
+            "--exclude", f"{name}/rootfs",
+            # Also skips snapshots left behind by a crashed backup
+            "--exclude", f"{name}/{SNAPSHOT_PREFIX}*",
+            "--no-anchored",
+            # Rename snapshot members (and hard links to them), not symlink targets
+            "--transform", f"s,^{snapshot},{name}/rootfs,S",
+            "-C", LXC_PATH, name,
+            "-C", parent, snapshot,
+        ]
+    
     def get_container_logs(self, name: str, lines: int = 100) -> str:
         """
         Get recent logs from a container.
@@ -333,23 +1783,16 @@ class HybridLXCAdapter:
             raise ValueError(f"Container '{name}' does not exist")
         
         # Try to read console log file
-        console_log = f"/var/lib/lxc/{name}/console.log"
+        console_log = os.path.join(LXC_PATH, name, "console.log")
         
-        if os.path.exists(console_log):
-            try:
-                result = subprocess.run(
-                    ["tail", "-n", str(lines), console_log],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    return result.stdout
-            except Exception:
-                pass
+        try:
+            return _tail_file(console_log, lines)
+        except OSError:
+            pass
         
         # If no console log, try to get recent output via lxc-attach
         # This only works for running containers
-        if container["state"] == "RUNNING":
+        if container.state == "RUNNING":
             try:
                 result = subprocess.run(
                     ["lxc-attach", "-n", name, "--", "dmesg", "-T"],
@@ -372,6 +1815,9 @@ class HybridLXCAdapter:
         """
         Get resource usage statistics for a container.
         
+        disk_usage is measured in the background and may lag by up to
+        DISK_USAGE_TTL (None until the first measurement finishes).
+        
         Args:
             name: Container name
             
@@ -381,66 +1827,37 @@ class HybridLXCAdapter:
         Raises:
             ValueError: If container doesn't exist
         """
-        container = self.get_container(name)
+        return self._container_stats(name, self.get_container(name))
+    
+    async def aget_container_stats(self, name: str) -> Dict:
+        """Async counterpart of get_container_stats()."""
+        return self._container_stats(name, await self.aget_container(name))
+    
+    def _container_stats(self, name: str, container: Optional[ContainerRecord]) -> Dict:
+        """Build the stats of a container record; the reads never block."""
         if not container:
             raise ValueError(f"Container '{name}' does not exist")
         
         stats = {
             "name": name,
-            "state": container["state"],
+            "state": container.state,
             "cpu_usage": None,
             "memory_usage": None,
             "memory_limit": None,
             "disk_usage": None,
         }
         
-        if container["state"] != "RUNNING":
+        if container.state != "RUNNING":
             return stats
         
-        # Get cgroup path for the container
-        cgroup_base = f"/sys/fs/cgroup/lxc.payload.{name}"
-        
-        # Try cgroup v2 paths first, then v1
         try:
-            # CPU usage (cgroup v2)
-            cpu_stat_file = f"{cgroup_base}/cpu.stat"
-            if os.path.exists(cpu_stat_file):
-                with open(cpu_stat_file, 'r') as f:
-                    for line in f:
-                        if line.startswith('usage_usec'):
-                            stats["cpu_usage"] = int(line.split()[1])
-                            break
-            
-            # Memory usage (cgroup v2)
-            mem_current_file = f"{cgroup_base}/memory.current"
-            mem_max_file = f"{cgroup_base}/memory.max"
-            
-            if os.path.exists(mem_current_file):
-                with open(mem_current_file, 'r') as f:
-                    stats["memory_usage"] = int(f.read().strip())
-            
-            if os.path.exists(mem_max_file):
-                with open(mem_max_file, 'r') as f:
-                    val = f.read().strip()
-                    if val != "max":
-                        stats["memory_limit"] = int(val)
-        except Exception as e:
-            print(f"DEBUG: Error reading cgroup stats: {e}")
+            stats.update(self._cgroup_stats.read(name))
+        except (ValueError, IndexError) as e:
+            logger.debug("Error reading cgroup stats: %s", e)
         
-        # Disk usage - check rootfs size
-        rootfs_path = f"/var/lib/lxc/{name}/rootfs"
-        if os.path.exists(rootfs_path):
-            try:
-                result = subprocess.run(
-                    ["du", "-sb", rootfs_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                if result.returncode == 0:
-                    stats["disk_usage"] = int(result.stdout.split()[0])
-            except Exception:
-                pass
+        # Disk usage - served from the background-measured cache
+        rootfs_path = os.path.join(LXC_PATH, name, "rootfs")
+        stats["disk_usage"] = self._disk_cache.get(name, rootfs_path)
         
         return stats
 
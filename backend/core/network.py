@@ -4,30 +4,122 @@ LXC Simple Manager - Network Configuration Manager
 Manages iptables NAT rules and DHCP static IP assignments for LXC containers.
 
 Architecture:
-    - Uses a dedicated iptables chain (LXC_MANAGER) to avoid conflicts
+    - Uses a dedicated iptables chain (LXC_MANAGER) to avoid conflicts,
+      or a dedicated nftables table when python3-nftables is installed
     - Rules are persisted in the database and synced to the kernel
     - DHCP leases are managed via dnsmasq configuration file
 """
 
+import asyncio
+import fcntl
+import hashlib
+import logging
 import os
+import re
+import shutil
+import signal
 import subprocess
-from typing import Dict, List
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
 
+from backend.core.nft import NFTABLES_AVAILABLE, NftBackend, RuleGroups
 from backend.database import (
     PortMapping,
+    RuleRecord,
     add_rule_to_db,
+    add_rules_to_db,
     delete_rule_from_db,
     get_all_rules,
+    get_rule_records,
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 # =============================================================================
 # Configuration
 # =============================================================================
 
 DHCP_CONFIG_FILE = "/etc/lxc/dhcp.conf"
+
+# dnsmasq hosts file holding the static assignments ("<name>,<ip>" lines),
+# reread on SIGHUP; DHCP_CONFIG_FILE points dnsmasq at it
+DHCP_HOSTS_FILE = "/etc/lxc/dhcp-hosts.conf"
+_HOSTSFILE_DIRECTIVE = f"dhcp-hostsfile={DHCP_HOSTS_FILE}"
+DNSMASQ_PID_FILE = "/run/lxc/dnsmasq.pid"
+
+# "dhcp-host=<name>,<ip>[,...]" entries of DHCP_CONFIG_FILE
+_DHCP_RE = re.compile(r"^\s*dhcp-host=\s*([^,\s]+)\s*,\s*([^,\s]+)", re.M)
+# "<name>,<ip>[,...]" entries of DHCP_HOSTS_FILE
+_DHCP_HOSTS_RE = re.compile(r"^\s*([^,\s#]+)\s*,\s*([^,\s]+)", re.M)
 IPTABLES_CHAIN_NAME = "LXC_MANAGER"
 
+# Written once a worker has applied the rules since boot (/run is a tmpfs);
+# holds the backend and a digest of the rule set it applied
+INIT_MARKER_FILE = "/run/lxc_manager/init.done"
+
+# Resolved once at import so no iptables call walks PATH
+IPTABLES = shutil.which("iptables") or "iptables"
+# Batch loader for whole-chain syncs; None falls back to one call per rule
+IPTABLES_RESTORE = shutil.which("iptables-restore")
+IPTABLES_RESTORE_CMD = [IPTABLES_RESTORE, "--noflush", "-T", "nat"]
+
+# Most ports a single iptables multiport match accepts
+MULTIPORT_MAX = 15
+
+# Rule changes made within this many seconds of each other share one sync
+SYNC_DELAY = 0.05
+
+# Seconds between attempts of async_rules() to take the apply lock
+APPLY_LOCK_POLL = 0.01
+
+# Static IP changes made within this many seconds share one dnsmasq reload
+DHCP_RELOAD_DELAY = 0.5
+
+# Line prefixes of restore script commands on our chain
+_APPEND_PREFIX = f"-A {IPTABLES_CHAIN_NAME} "
+_DELETE_PREFIX = f"-D {IPTABLES_CHAIN_NAME} "
+
+
+# Most rule specs _format_rule keeps; stale ones are simply evicted
+FORMAT_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _format_rule(
+    interface: Optional[str],
+    protocol: str,
+    ports: Tuple[int, ...],
+    internal_ip: str,
+    internal_port: int,
+) -> str:
+    """
+    Render one DNAT rule as it follows "-A LXC_MANAGER" in a restore script.
+    
+    Cached: every sync re-renders the same rules, so only new or changed
+    ones are formatted again.
+    
+    Args:
+        interface: Input interface, or None to match any
+        protocol: "tcp" or "udp"
+        ports: External ports (at most MULTIPORT_MAX)
+        internal_ip: Container IP to forward to
+        internal_port: Container port to forward to
+        
+    Returns:
+        Rule specification
+    """
+    if len(ports) == 1:
+        match = f"--dport {ports[0]}"
+    else:
+        match = "-m multiport --dports " + ",".join(map(str, ports))
+    prefix = f"-i {interface} " if interface else ""
+    return f"{prefix}-p {protocol} {match} -j DNAT --to-destination {internal_ip}:{internal_port}"
+
 
 class NetworkManager:
     """
@@ -45,25 +137,114 @@ class NetworkManager:
         Note: Network initialization is deferred to initialize_network()
         to prevent side effects during import.
         """
-        pass
+        self._sync_lock = threading.Lock()
+        self._sync_timer: Optional[threading.Timer] = None
+        self._sync_pending = False
+        # Serializes syncs from the debounce timer and explicit applies
+        self._apply_lock = threading.Lock()
+        # Queues async_rules() callers, so at most one polls _apply_lock
+        self._async_apply_lock = asyncio.Lock()
+        # Rule specs in the chain after the last successful batch sync;
+        # None when the kernel state is unknown and needs a full rebuild
+        self._applied: Optional[Set[str]] = None
+        # Set by initialize_network() when nftables replaces iptables
+        self._nft: Optional[NftBackend] = None
+        # Parsed DHCP_CONFIG_FILE and the mtime it was parsed at
+        self._static_lock = threading.Lock()
+        self._static_ips: Optional[Dict[str, str]] = None
+        self._static_mtime: Optional[int] = None
+        self._reload_lock = threading.Lock()
+        self._reload_timer: Optional[threading.Timer] = None
+        # Whether assignments live in DHCP_HOSTS_FILE; None until checked
+        self._hostsfile: Optional[bool] = None
+        # Moving them there is tried once, by the first write
+        self._migration_tried = False
     
-    def _run_iptables(self, cmd: List[str]) -> None:
+    def _run_iptables(self, cmd: List[str], input: Optional[str] = None) -> None:
         """
         Execute an iptables command.
         
         Args:
-            cmd: Command arguments (without 'iptables' prefix)
+            cmd: Full command line (iptables or iptables-restore)
+            input: Optional text fed to the command's stdin
             
         Raises:
             RuntimeError: If the command fails
         """
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr.strip() if e.stderr else str(e)
-            print(f"ERROR: iptables command failed: {error_msg}")
+        # Nothing is read from stdout; stderr is only decoded on failure
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        _, stderr = proc.communicate(input.encode() if input is not None else None)
+        
+        if proc.returncode != 0:
+            error_msg = stderr.decode(errors="replace").strip() or f"exit status {proc.returncode}"
+            logger.error("iptables command failed: %s", error_msg)
             raise RuntimeError(f"iptables failed: {error_msg}")
     
+    async def _arun_iptables(self, cmd: List[str], input: Optional[str] = None) -> None:
+        """
+        Execute an iptables command without blocking the event loop.
+        
+        Args:
+            cmd: Full command line (iptables or iptables-restore)
+            input: Optional text fed to the command's stdin
+            
+        Raises:
+            RuntimeError: If the command fails
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate(input.encode() if input is not None else None)
+        
+        if proc.returncode != 0:
+            error_msg = stderr.decode(errors="replace").strip() or f"exit status {proc.returncode}"
+            logger.error("iptables command failed: %s", error_msg)
+            raise RuntimeError(f"iptables failed: {error_msg}")
+    
+    def _iptables_status(self, cmd: List[str]) -> int:
+        """
+        Run an iptables probe whose output is not needed.
+        
+        Args:
+            cmd: Full command line
+            
+        Returns:
+            The command's exit status
+        """
+        return subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    def _rule_args(self, rule: RuleRecord) -> List[str]:
+        """
+        Build the match/target arguments of a DNAT rule.
+        
+        Args:
+            rule: Rule to render
+            
+        Returns:
+            Arguments following "-A LXC_MANAGER"
+        """
+        args = []
+        
+        # Add interface filter if specified
+        if rule.interface and rule.interface.lower() != "all":
+            args += ["-i", rule.interface]
+        
+        args += [
+            "-p", rule.protocol,
+            "--dport", str(rule.external_port),
+            "-j", "DNAT",
+            "--to-destination", f"{rule.internal_ip}:{rule.internal_port}",
+        ]
+        return args
+    
     # =========================================================================
     # Initialization
     # =========================================================================
@@ -76,68 +257,417 @@ class NetworkManager:
             1. Create the LXC_MANAGER chain if it doesn't exist
             2. Add jump rule from PREROUTING to our chain
             3. Sync rules from database to kernel
+        
+        When python3-nftables is installed and the kernel accepts its
+        commands, rules go to a dedicated nftables table instead and the
+        iptables chain is only emptied.
+        
+        Workers starting together are serialized on INIT_MARKER_FILE. A
+        worker finding the marker written for the current rule set, with
+        the jump rule and the expected number of chain rules still in
+        place (see _chain_intact), skips the steps above.
         """
-        print("INFO: Initializing network layer...")
+        logger.info("Initializing network layer...")
         
-        # Create chain (ignore error if already exists)
-        subprocess.run(
-            ["iptables", "-t", "nat", "-N", IPTABLES_CHAIN_NAME],
-            capture_output=True
-        )
+        with self._init_marker() as marker:
+            if NFTABLES_AVAILABLE:
+                backend = NftBackend()
+                if backend.probe():
+                    logger.info("Using nftables backend")
+                    self._nft = backend
+                    # Drop rules a previous iptables-based run left behind
+                    try:
+                        self._iptables_status([IPTABLES, "-t", "nat", "-F", IPTABLES_CHAIN_NAME])
+                    except OSError:
+                        pass  # No iptables at all
+                    self.sync_rules(full=True)
+                    return
+            
+            specs = self._rule_specs(get_rule_records())
+            stamp = "iptables " + self._rules_digest(specs)
+            if marker is not None and marker.read() == stamp and self._chain_intact(len(specs)):
+                logger.info("Rules already applied since boot; skipping sync")
+                # The chain holds these rules, so later syncs can be deltas
+                with self._apply_lock:
+                    if self._applied is None:
+                        self._applied = set(specs)
+                return
+            
+            # Create chain (ignore error if already exists)
+            self._iptables_status([IPTABLES, "-t", "nat", "-N", IPTABLES_CHAIN_NAME])
+            
+            # Check if jump rule exists
+            check_status = self._iptables_status(
+                [IPTABLES, "-t", "nat", "-C", "PREROUTING", "-j", IPTABLES_CHAIN_NAME]
+            )
+            
+            # Add jump rule if missing
+            if check_status != 0:
+                logger.info("Installing jump rule for %s", IPTABLES_CHAIN_NAME)
+                self._run_iptables([
+                    IPTABLES, "-t", "nat", "-I", "PREROUTING", "1",
+                    "-j", IPTABLES_CHAIN_NAME
+                ])
+            
+            # Sync rules from database
+            self.sync_rules()
+            
+            # Only a clean batch sync vouches for the whole rule set
+            if marker is not None and self._applied is not None:
+                marker.seek(0)
+                marker.truncate()
+                marker.write(stamp)
+                marker.flush()
+    
+    @contextmanager
+    def _init_marker(self) -> Iterator[Optional[TextIO]]:
+        """
+        Open and exclusively lock INIT_MARKER_FILE for initialize_network().
         
-        # Check if jump rule exists
-        check_result = subprocess.run(
-            ["iptables", "-t", "nat", "-C", "PREROUTING", "-j", IPTABLES_CHAIN_NAME],
-            capture_output=True
-        )
+        Yields:
+            The marker file positioned at its start, or None if /run is
+            not writable (every start then initializes fully)
+        """
+        try:
+            os.makedirs(os.path.dirname(INIT_MARKER_FILE), exist_ok=True)
+            marker = open(INIT_MARKER_FILE, 'a+')
+        except OSError:
+            yield None
+            return
+        
+        with marker:
+            fcntl.flock(marker.fileno(), fcntl.LOCK_EX)
+            marker.seek(0)
+            yield marker
+    
+    def _rules_digest(self, specs: List[str]) -> str:
+        """Fingerprint of the rule specs the database currently asks for."""
+        return hashlib.blake2b("\n".join(specs).encode(), digest_size=16).hexdigest()
+    
+    def _chain_intact(self, expected: int) -> bool:
+        """
+        Check that the jump rule and our chain's rules are still in place.
         
-        # Add jump rule if missing
-        if check_result.returncode != 0:
-            print(f"INFO: Installing jump rule for {IPTABLES_CHAIN_NAME}")
-            self._run_iptables([
-                "iptables", "-t", "nat", "-I", "PREROUTING", "1",
-                "-j", IPTABLES_CHAIN_NAME
-            ])
+        Catches a flush or firewall reload since the init marker was
+        written. iptables -S normalizes rules (adding "-m tcp" and the
+        like), so rules are counted rather than compared.
         
-        # Sync rules from database
-        self.sync_rules()
+        Args:
+            expected: Number of rules the chain should hold
+        
+        Returns:
+            True if the jump rule exists and the chain holds `expected` rules
+        """
+        # -C also fails if the chain itself is gone
+        if self._iptables_status(
+            [IPTABLES, "-t", "nat", "-C", "PREROUTING", "-j", IPTABLES_CHAIN_NAME]
+        ) != 0:
+            return False
+        
+        result = subprocess.run(
+            [IPTABLES, "-t", "nat", "-S", IPTABLES_CHAIN_NAME],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        if result.returncode != 0:
+            return False
+        return sum(line.startswith("-A ") for line in result.stdout.splitlines()) == expected
     
-    def sync_rules(self) -> None:
+    def sync_rules(self, full: bool = False) -> None:
         """
         Synchronize rules from database to kernel.
         
         This is the master sync operation that:
-            1. Flushes all rules from our chain
-            2. Reads rules from database
-            3. Applies each rule to iptables
+            1. Reads rules from database
+            2. Compares them with the rules applied by the previous sync
+            3. Deletes/appends only the difference in one iptables-restore
+               transaction
+        
+        The whole chain is rebuilt instead when forced, on the first sync,
+        or after a failed one, since the kernel state is then unknown. A
+        delta the kernel rejects (the chain was flushed or edited outside
+        lxc_manager) is also retried as a full rebuild.
+        With the nftables backend the chain is always replaced in a single
+        netlink transaction, skipped if nothing changed.
+        The per-rule iptables loop is only used when iptables-restore is
+        unavailable or rejects the batch, so one bad rule cannot keep the
+        others from being applied.
+        
+        Args:
+            full: Flush and rebuild the chain even if nothing changed
         """
-        print("INFO: Syncing rules from database to kernel...")
+        logger.info("Syncing rules from database to kernel...")
         
-        # Flush our chain
-        self._run_iptables(["iptables", "-t", "nat", "-F", IPTABLES_CHAIN_NAME])
+        with self._apply_lock:
+            # Get rules from database (plain records: only their fields are used)
+            rules = get_rule_records()
+            
+            if self._nft is not None:
+                self._nft.sync(self._rule_groups(rules), full=full)
+                return
+            
+            desired = self._rule_specs(rules)
+            
+            if IPTABLES_RESTORE:
+                delta = not full and self._applied is not None
+                script = self._sync_script(desired, full)
+                if script is None:
+                    return
+                
+                try:
+                    self._run_iptables(IPTABLES_RESTORE_CMD, input=script)
+                    self._applied = set(desired)
+                    return
+                except RuntimeError as e:
+                    self._log_restore_failure(e, delta)
+                
+                if delta:
+                    try:
+                        self._run_iptables(IPTABLES_RESTORE_CMD, input=self._build_restore_script(desired))
+                        self._applied = set(desired)
+                        return
+                    except RuntimeError as e:
+                        self._log_restore_failure(e, False)
+            
+            # Per-rule failures leave the chain in an unknown state
+            self._applied = None
+            self._sync_rules_one_by_one(rules)
+    
+    async def async_rules(self, full: bool = False) -> None:
+        """
+        Async counterpart of sync_rules().
         
-        # Get rules from database
-        rules = get_all_rules()
+        iptables-restore runs as an asyncio subprocess, so the event loop
+        keeps serving requests while it works. The nftables backend and
+        the per-rule fallback block, so they run on a worker thread.
         
-        # Apply each rule
+        Args:
+            full: Flush and rebuild the chain even if nothing changed
+        """
+        if self._nft is not None or not IPTABLES_RESTORE:
+            await asyncio.to_thread(self.sync_rules, full)
+            return
+        
+        logger.info("Syncing rules from database to kernel...")
+        
+        # Async callers queue on the event loop; only the one holding
+        # _async_apply_lock polls the thread lock, which is shared with
+        # the debounce timer. Polled: a worker thread blocked in
+        # acquire() would still take the lock, and never release it, if
+        # this task were cancelled meanwhile.
+        async with self._async_apply_lock:
+            while not self._apply_lock.acquire(blocking=False):
+                await asyncio.sleep(APPLY_LOCK_POLL)
+            try:
+                rules = await asyncio.to_thread(get_rule_records)
+                desired = self._rule_specs(rules)
+                delta = not full and self._applied is not None
+                script = self._sync_script(desired, full)
+                if script is None:
+                    return
+                
+                scripts = [script, self._build_restore_script(desired)] if delta else [script]
+                for script in scripts:
+                    try:
+                        await self._arun_iptables(IPTABLES_RESTORE_CMD, input=script)
+                        self._applied = set(desired)
+                        return
+                    except RuntimeError as e:
+                        self._log_restore_failure(e, delta)
+                        delta = False
+                    except asyncio.CancelledError:
+                        # iptables-restore may still apply the script: rebuild next time
+                        self._applied = None
+                        raise
+            finally:
+                self._apply_lock.release()
+        
+        def _fallback() -> None:
+            with self._apply_lock:
+                self._applied = None
+                self._sync_rules_one_by_one(rules)
+        
+        await asyncio.to_thread(_fallback)
+    
+    def _log_restore_failure(self, error: RuntimeError, delta: bool) -> None:
+        """
+        Report a rejected iptables-restore script.
+        
+        Args:
+            error: The failure raised by the restore
+            delta: Whether the script was a delta (a full rebuild follows)
+        """
+        if delta:
+            logger.warning(
+                "Delta sync rejected, %s was changed outside lxc_manager; rebuilding it: %s",
+                IPTABLES_CHAIN_NAME, error,
+            )
+        else:
+            logger.error("Batch sync failed, applying rules one by one: %s", error)
+    
+    def _sync_script(self, desired: List[str], full: bool = False) -> Optional[str]:
+        """
+        Build the iptables-restore script that brings our chain to `desired`.
+        
+        The caller must hold _apply_lock.
+        
+        Args:
+            desired: Rule specifications (see _rule_specs) the chain should hold
+            full: Rebuild the chain even if the previous sync's state is known
+            
+        Returns:
+            A full rebuild or delta script, or None if nothing changed
+        """
+        applied = None if full else self._applied
+        if applied is None:
+            return self._build_restore_script(desired)
+        
+        wanted = set(desired)
+        removed = [spec for spec in applied if spec not in wanted]
+        added = [spec for spec in desired if spec not in applied]
+        if not removed and not added:
+            return None
+        return self._build_delta_script(removed, added)
+    
+    def _rule_specs(self, rules: List[RuleRecord]) -> List[str]:
+        """
+        Render rules as they follow "-A LXC_MANAGER" in a restore script.
+        
+        Rules that only differ in their external port share one multiport
+        rule (up to MULTIPORT_MAX ports each), so packets walk one chain
+        entry per destination instead of one per forwarded port.
+        
+        Args:
+            rules: Rules from get_rule_records()
+            
+        Returns:
+            Rule specifications, in first-seen order of their targets
+        """
+        specs = []
+        for (interface, protocol, internal_ip, internal_port), ports in self._rule_groups(rules).items():
+            specs.extend(
+                _format_rule(interface, protocol, tuple(ports[i:i + MULTIPORT_MAX]), internal_ip, internal_port)
+                for i in range(0, len(ports), MULTIPORT_MAX)
+            )
+        return specs
+    
+    def _rule_groups(self, rules: List[RuleRecord]) -> RuleGroups:
+        """
+        Group rules that only differ in their external port.
+        
+        Args:
+            rules: Rules from get_rule_records()
+            
+        Returns:
+            Dict mapping (interface or None, protocol, internal_ip,
+            internal_port) to external ports, in first-seen order
+        """
+        groups: RuleGroups = {}
         for rule in rules:
-            cmd = [
-                "iptables", "-t", "nat", "-A", IPTABLES_CHAIN_NAME,
-                "-p", rule.protocol,
-                "--dport", str(rule.external_port),
-                "-j", "DNAT",
-                "--to-destination", f"{rule.internal_ip}:{rule.internal_port}"
-            ]
+            interface = rule.interface if rule.interface and rule.interface.lower() != "all" else None
+            key = (interface, rule.protocol, rule.internal_ip, rule.internal_port)
+            groups.setdefault(key, []).append(rule.external_port)
+        return groups
+    
+    def _build_restore_script(self, specs: List[str]) -> str:
+        """
+        Build an iptables-restore script that rebuilds our chain.
+        
+        Args:
+            specs: Rule specifications (see _rule_specs) the chain should contain
             
-            # Add interface filter if specified
-            if rule.interface and rule.interface.lower() != "all":
-                cmd.insert(5, "-i")
-                cmd.insert(6, rule.interface)
+        Returns:
+            Script text for `iptables-restore --noflush -T nat`
+        """
+        lines = [
+            "*nat",
+            f":{IPTABLES_CHAIN_NAME} - [0:0]",
+            f"-F {IPTABLES_CHAIN_NAME}",
+        ]
+        lines.extend(_APPEND_PREFIX + spec for spec in specs)
+        lines.append("COMMIT")
+        return "\n".join(lines) + "\n"
+    
+    def _build_delta_script(self, removed: List[str], added: List[str]) -> str:
+        """
+        Build an iptables-restore script that edits our chain in place.
+        
+        Args:
+            removed: Rule specifications to delete
+            added: Rule specifications to append
+            
+        Returns:
+            Script text for `iptables-restore --noflush -T nat`
+        """
+        lines = ["*nat"]
+        lines.extend(_DELETE_PREFIX + spec for spec in removed)
+        lines.extend(_APPEND_PREFIX + spec for spec in added)
+        lines.append("COMMIT")
+        return "\n".join(lines) + "\n"
+    
+    def schedule_sync(self, delay: float = SYNC_DELAY) -> None:
+        """
+        Request a sync_rules() run shortly, coalescing repeated requests.
+        
+        Every call restarts the timer, so a burst of rule changes is
+        applied to the kernel with a single sync once it settles.
+        
+        Args:
+            delay: Seconds of quiet to wait for before syncing
+        """
+        with self._sync_lock:
+            self._sync_pending = True
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+            self._sync_timer = threading.Timer(delay, self._run_scheduled_sync)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+    
+    def flush_pending_sync(self) -> None:
+        """
+        Run a scheduled sync now instead of waiting for its timer.
+        
+        Does nothing if no sync is pending.
+        
+        Raises:
+            RuntimeError: If the sync fails
+        """
+        with self._sync_lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if not self._sync_pending:
+                return
+            self._sync_pending = False
+        
+        self.sync_rules()
+    
+    def _run_scheduled_sync(self) -> None:
+        """Debounce timer callback: flush the pending sync, logging failures."""
+        try:
+            self.flush_pending_sync()
+        except Exception as e:
+            logger.error("Scheduled rule sync failed: %s", e)
+    
+    def _sync_rules_one_by_one(self, rules: List[RuleRecord]) -> None:
+        """
+        Flush our chain and apply each rule with its own iptables call.
+        
+        Args:
+            rules: Port mappings the chain should contain
+        """
+        # Flush our chain
+        self._run_iptables([IPTABLES, "-t", "nat", "-F", IPTABLES_CHAIN_NAME])
+        
+        # Apply each rule
+        for rule in rules:
+            cmd = [IPTABLES, "-t", "nat", "-A", IPTABLES_CHAIN_NAME, *self._rule_args(rule)]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Applying %s", " ".join(cmd))
             
             try:
                 self._run_iptables(cmd)
             except Exception as e:
-                print(f"ERROR: Failed to apply rule for port {rule.external_port}: {e}")
+                logger.error("Failed to apply rule for port %s: %s", rule.external_port, e)
     
     # =========================================================================
     # Port Forwarding (DNAT) Operations
@@ -156,7 +686,8 @@ class NetworkManager:
         """
         Add a new port forwarding rule.
         
-        The rule is persisted to database and immediately applied to iptables.
+        The rule is persisted to database and applied to iptables by the
+        next (debounced) sync.
         
         Args:
             rule: Port mapping configuration
@@ -165,27 +696,79 @@ class NetworkManager:
             ValueError: If the external port is already in use
         """
         add_rule_to_db(rule)
+        self.schedule_sync()
+    
+    def add_forwarding_rules(self, rules: List[PortMapping]) -> None:
+        """
+        Add several port forwarding rules at once.
+        
+        All rules are stored in one database transaction; the following
+        sync appends just those rules with a single iptables-restore call.
+        
+        Args:
+            rules: Port mapping configurations
+            
+        Raises:
+            ValueError: If an external port is already in use or repeated
+        """
+        if not rules:
+            return
+        
+        add_rules_to_db(rules)
         self.sync_rules()
     
+    async def aadd_forwarding_rules(self, rules: List[PortMapping]) -> None:
+        """
+        Async counterpart of add_forwarding_rules().
+        
+        Args:
+            rules: Port mapping configurations
+            
+        Raises:
+            ValueError: If an external port is already in use or repeated
+        """
+        if not rules:
+            return
+        
+        await asyncio.to_thread(add_rules_to_db, rules)
+        await self.async_rules()
+    
     def remove_forwarding_rule(self, external_port: int) -> None:
         """
         Remove a port forwarding rule.
         
-        The rule is deleted from database and iptables is updated.
+        The rule is deleted from database and iptables is updated by the
+        next (debounced) sync.
         
         Args:
             external_port: The external port to remove
         """
         delete_rule_from_db(external_port)
-        self.sync_rules()
+        self.schedule_sync()
     
     def apply_iptables(self) -> None:
         """
         Force re-application of all iptables rules.
         
         This is called when the user clicks "Apply to System" in the UI.
+        The chain is rebuilt from scratch, repairing any changes made
+        outside this process; a pending debounced sync is absorbed into it.
         """
-        self.sync_rules()
+        self._cancel_pending_sync()
+        self.sync_rules(full=True)
+    
+    async def aapply_iptables(self) -> None:
+        """Async counterpart of apply_iptables()."""
+        self._cancel_pending_sync()
+        await self.async_rules(full=True)
+    
+    def _cancel_pending_sync(self) -> None:
+        """Drop a scheduled sync that an immediate one is about to cover."""
+        with self._sync_lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self._sync_pending = False
     
     # =========================================================================
     # DHCP / Static IP Operations
@@ -195,48 +778,39 @@ class NetworkManager:
         """
         Get all static IP assignments.
         
-        Reads the dnsmasq DHCP configuration file.
+        Reads the dnsmasq hosts file (or the DHCP configuration file),
+        reparsing it only when its mtime changed since the last read or
+        write.
         
         Returns:
             Dict mapping container names to IP addresses
         """
-        leases = {}
-        
-        if not os.path.exists(DHCP_CONFIG_FILE):
-            return leases
-        
-        with open(DHCP_CONFIG_FILE, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith("dhcp-host="):
-                    parts = line.replace("dhcp-host=", "").split(",")
-                    if len(parts) >= 2:
-                        name = parts[0].strip()
-                        ip = parts[1].strip()
-                        leases[name] = ip
-        
-        return leases
+        with self._static_lock:
+            return dict(self._load_static_ips())
     
     def set_static_ip(self, name: str, ip: str) -> None:
         """
         Set or update a static IP assignment for a container.
         
-        Updates the dnsmasq configuration file and reloads lxc-net.
+        Updates the dnsmasq hosts file and schedules a reload of dnsmasq,
+        shared with other changes made in quick succession.
+        Nothing is written or reloaded if the assignment already exists.
         
         Args:
             name: Container name (used as hostname identifier)
             ip: IP address to assign
         """
-        leases = self.get_static_ips()
-        leases[name] = ip
-        
-        # Write updated configuration
-        with open(DHCP_CONFIG_FILE, 'w') as f:
-            for container_name, container_ip in leases.items():
-                f.write(f"dhcp-host={container_name},{container_ip}\n")
+        with self._static_lock:
+            current = self._load_static_ips()
+            if current.get(name) == ip:
+                return  # Unchanged: skip the rewrite and the dnsmasq reload
+            
+            leases = dict(current)
+            leases[name] = ip
+            self._write_static_ips(leases)
         
         # Reload dnsmasq to pick up changes
-        subprocess.run(["systemctl", "reload", "lxc-net"], check=False)
+        self._schedule_dhcp_reload()
     
     def remove_static_ip(self, name: str) -> bool:
         """
@@ -248,19 +822,227 @@ class NetworkManager:
         Returns:
             True if the entry was removed, False if not found
         """
-        leases = self.get_static_ips()
+        with self._static_lock:
+            leases = dict(self._load_static_ips())
+            if leases.pop(name, None) is None:
+                return False
+            
+            self._write_static_ips(leases)
         
-        if name not in leases:
+        self._schedule_dhcp_reload()
+        return True
+    
+    def flush_pending_dhcp_reload(self) -> None:
+        """Reload dnsmasq now if a scheduled reload has not run yet."""
+        with self._reload_lock:
+            if self._reload_timer is None:
+                return
+            self._reload_timer.cancel()
+            self._reload_timer = None
+        
+        self._reload_dhcp()
+    
+    def _load_static_ips(self) -> Dict[str, str]:
+        """
+        Return the cached assignment map, reparsing the file if it changed.
+        
+        The caller must hold _static_lock and must not mutate the returned
+        dict, which is the cache itself.
+        """
+        path, pattern = self._static_source()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        
+        if self._static_ips is None or mtime != self._static_mtime:
+            if mtime is None:
+                self._static_ips = {}
+            else:
+                with open(path, 'r') as f:
+                    self._static_ips = dict(pattern.findall(f.read()))
+            self._static_mtime = mtime
+        
+        return self._static_ips
+    
+    def _write_static_ips(self, leases: Dict[str, str]) -> None:
+        """
+        Replace the stored assignments. The caller must hold _static_lock.
+        
+        Args:
+            leases: Dict mapping container names to IP addresses
+        """
+        if not self._hostsfile and not self._migration_tried:
+            self._migration_tried = True
+            self._hostsfile = self._migrate_to_hostsfile()
+        
+        path, _ = self._static_source()
+        if self._hostsfile:
+            payload = "".join(f"{n},{i}\n" for n, i in leases.items())
+        else:
+            payload = "".join(f"dhcp-host={n},{i}\n" for n, i in leases.items())
+        
+        self._atomic_write(path, payload)
+        self._static_ips = leases
+        self._static_mtime = os.stat(path).st_mtime_ns
+    
+    def _static_source(self) -> Tuple[str, "re.Pattern[str]"]:
+        """
+        Return the file holding the assignments and the regex parsing it.
+        
+        Entries live in DHCP_HOSTS_FILE, which dnsmasq rereads on SIGHUP,
+        once DHCP_CONFIG_FILE points dnsmasq at it. Only the first write
+        moves them there (see _migrate_to_hostsfile), so reads never
+        rewrite the configuration or restart dnsmasq. If moving fails they
+        stay in DHCP_CONFIG_FILE for the life of the process.
+        The caller must hold _static_lock.
+        """
+        if self._hostsfile is None:
+            content = self._read_dhcp_config()
+            self._hostsfile = content is not None and _HOSTSFILE_DIRECTIVE in content.splitlines()
+        if self._hostsfile:
+            return DHCP_HOSTS_FILE, _DHCP_HOSTS_RE
+        return DHCP_CONFIG_FILE, _DHCP_RE
+    
+    def _migrate_to_hostsfile(self) -> bool:
+        """
+        Move dhcp-host entries from DHCP_CONFIG_FILE to DHCP_HOSTS_FILE.
+        
+        DHCP_CONFIG_FILE keeps its other lines and gains a dhcp-hostsfile
+        directive; lxc-net is reloaded once so dnsmasq picks it up.
+        
+        Returns:
+            True if the entries are (now) kept in DHCP_HOSTS_FILE
+        """
+        content = self._read_dhcp_config()
+        if content is None:
             return False
         
-        del leases[name]
+        if _HOSTSFILE_DIRECTIVE in content.splitlines():
+            return True
         
-        with open(DHCP_CONFIG_FILE, 'w') as f:
-            for container_name, container_ip in leases.items():
-                f.write(f"dhcp-host={container_name},{container_ip}\n")
+        entries = _DHCP_RE.findall(content)
+        lines = [line for line in content.splitlines() if not _DHCP_RE.match(line)]
+        lines.append(_HOSTSFILE_DIRECTIVE)
+        try:
+            self._atomic_write(DHCP_HOSTS_FILE, "".join(f"{n},{i}\n" for n, i in entries))
+            self._atomic_write(DHCP_CONFIG_FILE, "\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning("Keeping static IPs in %s: %s", DHCP_CONFIG_FILE, e)
+            return False
         
-        subprocess.run(["systemctl", "reload", "lxc-net"], check=False)
+        logger.info("Moved static IPs to %s", DHCP_HOSTS_FILE)
+        self._reload_lxc_net()
         return True
+    
+    def _read_dhcp_config(self) -> Optional[str]:
+        """
+        Read DHCP_CONFIG_FILE.
+        
+        Returns:
+            Its contents ("" if missing), or None if it cannot be read
+        """
+        try:
+            with open(DHCP_CONFIG_FILE, 'r') as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+        except OSError as e:
+            logger.warning("Cannot read %s: %s", DHCP_CONFIG_FILE, e)
+            return None
+    
+    def _atomic_write(self, path: str, payload: str) -> None:
+        """
+        Replace a configuration file with the given text.
+        
+        The whole file is written with one write(), fsynced next to the
+        original and renamed over it, so dnsmasq never sees a partially
+        written file, even after a crash.
+        
+        Args:
+            path: File to replace
+            payload: New file contents
+        """
+        directory = os.path.dirname(path)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        
+        try:
+            f = tempfile.NamedTemporaryFile('w', dir=directory, delete=False)
+        except OSError:
+            # Directory not writable (only the file is): overwrite in place
+            with open(path, 'w') as f:
+                f.write(payload)
+        else:
+            try:
+                with f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(f.name, mode)
+                os.replace(f.name, path)
+            except OSError:
+                os.unlink(f.name)
+                raise
+    
+    def _schedule_dhcp_reload(self, delay: float = DHCP_RELOAD_DELAY) -> None:
+        """
+        Reload dnsmasq once DHCP changes stop arriving for `delay` seconds.
+        
+        Args:
+            delay: Seconds of quiet to wait for before reloading
+        """
+        with self._reload_lock:
+            if self._reload_timer is not None:
+                self._reload_timer.cancel()
+            self._reload_timer = threading.Timer(delay, self.flush_pending_dhcp_reload)
+            self._reload_timer.daemon = True
+            self._reload_timer.start()
+    
+    def _reload_dhcp(self) -> None:
+        """
+        Make dnsmasq pick up the static IP assignments.
+        
+        With the hosts file a SIGHUP is enough: dnsmasq rereads it without
+        restarting. lxc-net is only reloaded when dnsmasq's pid is unknown
+        or the entries still live in DHCP_CONFIG_FILE.
+        """
+        if self._hostsfile:
+            pid = self._dnsmasq_pid()
+            if pid is not None:
+                try:
+                    os.kill(pid, signal.SIGHUP)
+                    return
+                except OSError as e:
+                    logger.warning("Cannot signal dnsmasq (%s): %s", pid, e)
+        
+        self._reload_lxc_net()
+    
+    def _dnsmasq_pid(self) -> Optional[int]:
+        """
+        Return lxc-net's dnsmasq pid, or None if it is not running.
+        
+        The pid file is reread on every (debounced) reload and the pid is
+        only trusted while /proc/<pid>/comm says dnsmasq, so a pid left
+        stale by an lxc-net restart and reused never gets signalled.
+        """
+        try:
+            with open(DNSMASQ_PID_FILE, 'r') as f:
+                pid = int(f.read().strip())
+            with open(f"/proc/{pid}/comm", 'r') as f:
+                comm = f.read().strip()
+        except (OSError, ValueError):
+            return None
+        return pid if comm == "dnsmasq" else None
+    
+    def _reload_lxc_net(self) -> None:
+        """Reload the lxc-net unit, which restarts its dnsmasq."""
+        try:
+            subprocess.run(["systemctl", "reload", "lxc-net"], check=False)
+        except OSError as e:
+            logger.error("Failed to reload lxc-net: %s", e)
 
 
 # Global instance
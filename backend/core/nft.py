@@ -0,0 +1,149 @@
+"""
+LXC Simple Manager - nftables Backend
+
+Applies port forwarding rules through libnftables (the `nftables` Python
+module shipped with python3-nftables) instead of the iptables CLI.
+
+Architecture:
+    - Rules live in a dedicated `ip lxc_manager` table with its own
+      prerouting NAT chain, so nothing else on the host is touched
+    - Every sync is one JSON command list, which libnftables submits to
+      the kernel as a single netlink transaction without forking
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Attempt to import libnftables bindings (optional)
+try:
+    from nftables import Nftables
+    NFTABLES_AVAILABLE = True
+except ImportError:
+    Nftables = None
+    NFTABLES_AVAILABLE = False
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+NFT_FAMILY = "ip"
+NFT_TABLE = "lxc_manager"
+NFT_CHAIN = "prerouting"
+
+# Standard "dstnat" priority of NAT prerouting hooks
+NFT_DSTNAT_PRIORITY = -100
+
+# (interface or None, protocol, internal_ip, internal_port) -> external ports
+RuleGroups = Dict[Tuple[Optional[str], str, str, int], List[int]]
+
+
+class NftBackend:
+    """
+    Applies DNAT rule groups to the kernel through libnftables.
+    """
+    
+    def __init__(self):
+        """
+        Create the libnftables context.
+        
+        Raises:
+            RuntimeError: If the nftables module is not installed
+        """
+        if not NFTABLES_AVAILABLE:
+            raise RuntimeError("python3-nftables is not installed")
+        
+        self._nft = Nftables()
+        self._nft.set_json_output(True)
+        # Groups applied by the last successful sync
+        self._applied: Optional[RuleGroups] = None
+    
+    def probe(self) -> bool:
+        """
+        Check that the kernel and libnftables accept our commands.
+        
+        Returns:
+            True if a read-only listing of the ruleset succeeds
+        """
+        try:
+            rc, _, _ = self._nft.json_cmd({"nftables": [{"list": {"tables": {}}}]})
+        except Exception:
+            return False
+        return rc == 0
+    
+    def sync(self, groups: RuleGroups, full: bool = False) -> None:
+        """
+        Replace our chain's rules with the given groups atomically.
+        
+        The table and chain are created if needed, flushed and refilled in
+        the same transaction, so packets never see a half-applied set.
+        
+        Args:
+            groups: Rule groups as built by NetworkManager._rule_groups()
+            full: Apply even if the groups match the last successful sync
+        
+        Raises:
+            RuntimeError: If libnftables rejects the transaction
+        """
+        if not full and groups == self._applied:
+            return
+        
+        commands = [
+            {"add": {"table": {"family": NFT_FAMILY, "name": NFT_TABLE}}},
+            {"add": {"chain": {
+                "family": NFT_FAMILY,
+                "table": NFT_TABLE,
+                "name": NFT_CHAIN,
+                "type": "nat",
+                "hook": "prerouting",
+                "prio": NFT_DSTNAT_PRIORITY,
+                "policy": "accept",
+            }}},
+            {"flush": {"chain": {"family": NFT_FAMILY, "table": NFT_TABLE, "name": NFT_CHAIN}}},
+        ]
+        commands += [
+            {"add": {"rule": {
+                "family": NFT_FAMILY,
+                "table": NFT_TABLE,
+                "chain": NFT_CHAIN,
+                "expr": self._rule_expr(key, ports),
+            }}}
+            for key, ports in groups.items()
+        ]
+        
+        self._applied = None
+        rc, _, error = self._nft.json_cmd({"nftables": commands})
+        if rc != 0:
+            raise RuntimeError(f"nftables failed: {error.strip()}")
+        self._applied = {key: list(ports) for key, ports in groups.items()}
+    
+    def _rule_expr(self, key: Tuple[Optional[str], str, str, int], ports: List[int]) -> List[dict]:
+        """
+        Build the JSON expression list of one DNAT rule.
+        
+        All external ports of a group share one rule through an anonymous
+        set, which the kernel matches with a hash lookup.
+        
+        Args:
+            key: (interface or None, protocol, internal_ip, internal_port)
+            ports: External ports forwarded to that target
+        
+        Returns:
+            The rule's "expr" list
+        """
+        interface, protocol, internal_ip, internal_port = key
+        expr = []
+        
+        if interface:
+            expr.append({"match": {
+                "op": "==",
+                "left": {"meta": {"key": "iifname"}},
+                "right": interface,
+            }})
+        
+        expr.append({"match": {
+            "op": "==",
+            "left": {"payload": {"protocol": protocol, "field": "dport"}},
+            "right": ports[0] if len(ports) == 1 else {"set": list(ports)},
+        }})
+        expr.append({"dnat": {"addr": internal_ip, "port": internal_port}})
+        return expr
@@ -5,12 +5,24 @@ This module defines the SQLModel-based database schema and provides
 helper functions for common database operations.
 """
 
+import atexit
+import logging
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Any, NamedTuple, Optional
 
+from sqlalchemy import bindparam, event, insert, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Field, SQLModel, Session, create_engine, select
 
 
+logger = logging.getLogger(__name__)
+
+
 # =============================================================================
 # Database Models
 # =============================================================================
@@ -63,12 +75,26 @@ class PortMapping(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     interface: str
     protocol: str
-    external_port: int
+    external_port: int = Field(index=True, unique=True)
     internal_ip: str
     internal_port: int
     comment: Optional[str] = None
 
 
+class RuleRecord(NamedTuple):
+    """
+    Read-only view of a PortMapping holding just what iptables needs.
+    
+    Plain tuple fields are cheaper to read than ORM attributes, and the
+    record is hashable.
+    """
+    interface: str
+    protocol: str
+    external_port: int
+    internal_ip: str
+    internal_port: int
+
+
 # =============================================================================
 # Database Engine Configuration
 # =============================================================================
@@ -76,21 +102,79 @@ class PortMapping(SQLModel, table=True):
 SQLITE_FILE_NAME = "lxc_manager.db"
 SQLITE_URL = f"sqlite:///{SQLITE_FILE_NAME}"
 
+# Keep connections open between requests instead of reconnecting (and
+# re-reading the schema) for every session. Older SQLAlchemy releases
+# default to NullPool for file-based SQLite, so the pool is set explicitly.
 engine = create_engine(
     SQLITE_URL,
-    connect_args={"check_same_thread": False}  # Required for FastAPI + SQLite
+    connect_args={"check_same_thread": False},  # Required for FastAPI + SQLite
+    poolclass=QueuePool,
 )
 
 
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Tune every new SQLite connection for many small writes.
+    
+    WAL lets request handlers read while a write commits and needs one
+    fsync per commit instead of several; synchronous=NORMAL is safe
+    under WAL (a power loss can only drop the latest commits).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=134217728")
+    cursor.close()
+
+
 def create_db_and_tables():
     """Initialize database schema, creating tables if they don't exist."""
     SQLModel.metadata.create_all(engine)
+    
+    # create_all() skips indexes added to (or made unique on) tables that
+    # already exist
+    existing = {ix["name"]: ix for ix in inspect(engine).get_indexes(PortMapping.__tablename__)}
+    for index in PortMapping.__table__.indexes:
+        current = existing.get(index.name)
+        if current is not None and bool(current["unique"]) == index.unique:
+            continue
+        if current is not None:
+            index.drop(engine)
+        try:
+            index.create(engine)
+        except IntegrityError:
+            raise RuntimeError(
+                "Duplicate external ports in the port mapping table; "
+                "remove them before starting"
+            )
 
 
 # =============================================================================
 # Settings Operations
 # =============================================================================
 
+# Statements built once at import rather than on every call
+_SETTING_VALUE_STMT = select(Setting.value).where(Setting.key == bindparam("key"))
+_ALL_RULES_STMT = select(PortMapping)
+# Column order matches RuleRecord
+_RULE_COLUMNS_STMT = select(
+    PortMapping.interface,
+    PortMapping.protocol,
+    PortMapping.external_port,
+    PortMapping.internal_ip,
+    PortMapping.internal_port,
+)
+
+# Process-local cache of setting values: key -> (fetched_at, value)
+_SETTINGS_CACHE_TTL = 60.0
+_settings_cache: dict[str, tuple[float, Any]] = {}
+# Bumped by set_setting(); a read that overlapped an update must not cache
+_settings_generation: dict[str, int] = {}
+_settings_lock = threading.Lock()
+
+
 def get_setting(key: str, default: str = "") -> str:
     """
     Retrieve a setting value from the database.
@@ -102,9 +186,10 @@ def get_setting(key: str, default: str = "") -> str:
     Returns:
         The setting value or default
     """
-    with Session(engine) as session:
-        setting = session.get(Setting, key)
-        return setting.value if setting else default
+    # Core connection: no Session, ORM instance or identity-map entry
+    with engine.connect() as conn:
+        value = conn.execute(_SETTING_VALUE_STMT, {"key": key}).scalar()
+        return value if value is not None else default
 
 
 def set_setting(key: str, value: str) -> None:
@@ -123,15 +208,62 @@ def set_setting(key: str, value: str) -> None:
             setting = Setting(key=key, value=value)
         session.add(setting)
         session.commit()
+    
+    with _settings_lock:
+        _settings_generation[key] = _settings_generation.get(key, 0) + 1
+        _settings_cache.pop(key, None)
+
+
+def cached_get_setting(key: str, default: str = "") -> str:
+    """
+    Retrieve a setting value, served from an in-memory cache when fresh.
+    
+    Settings change rarely, so reads within the TTL window skip the
+    database entirely. The entry is dropped by set_setting(), and a read
+    that raced with it is returned but not cached.
+    
+    Args:
+        key: The setting identifier
+        default: Value to return if setting doesn't exist
+        
+    Returns:
+        The setting value or default
+    """
+    now = time.monotonic()
+    cached = _settings_cache.get(key)
+    if cached is not None and now - cached[0] < _SETTINGS_CACHE_TTL:
+        return cached[1]
+    
+    generation = _settings_generation.get(key, 0)
+    value = get_setting(key, default)
+    with _settings_lock:
+        if _settings_generation.get(key, 0) == generation:
+            _settings_cache[key] = (now, value)
+    return value
 
 
 # =============================================================================
 # Audit Log Operations
 # =============================================================================
 
+# Audit entries are queued by callers and written by a single background
+# thread in batches, so no request waits on a SQLite commit. A batch is
+# written once it holds _AUDIT_BATCH_SIZE entries or _AUDIT_FLUSH_INTERVAL
+# seconds after its first entry.
+_AUDIT_BATCH_SIZE = 100
+_AUDIT_FLUSH_INTERVAL = 0.05
+_AUDIT_QUEUE: "queue.Queue[Optional[tuple]]" = queue.Queue()
+# Set by flush_audit_log(); entries logged afterwards (e.g. by backups still
+# running at shutdown) are written by their caller instead of queued
+_audit_stopped = threading.Event()
+
+
 def log_action(action: str, container: str, status: str, details: str = "") -> None:
     """
-    Record an action in the audit log.
+    Queue an action for the audit log.
+    
+    Never blocks while the audit writer thread runs; once it has been
+    stopped the entry is written immediately.
     
     Args:
         action: Type of action performed
@@ -139,15 +271,106 @@ def log_action(action: str, container: str, status: str, details: str = "") -> N
         status: Outcome of the action
         details: Additional context
     """
-    with Session(engine) as session:
-        log = AuditLog(
-            action=action,
-            container_name=container,
-            status=status,
-            details=details
-        )
-        session.add(log)
-        session.commit()
+    entry = (action, container, status, details, datetime.now())
+    if _audit_stopped.is_set():
+        _write_audit_batch([entry])
+        return
+    _AUDIT_QUEUE.put(entry)
+
+
+def log_actions(entries: list[tuple[str, str, str, str, datetime]]) -> None:
+    """
+    Record several actions in the audit log in a single transaction.
+    
+    Args:
+        entries: (action, container, status, details, timestamp) tuples
+    """
+    rows = [
+        {
+            "action": action,
+            "container_name": container,
+            "status": status,
+            "details": details,
+            "timestamp": timestamp,
+        }
+        for action, container, status, details, timestamp in entries
+    ]
+    # Core executemany: no ORM instance per row
+    with engine.begin() as conn:
+        conn.execute(insert(AuditLog.__table__), rows)
+
+
+def _write_audit_batch(batch: list[tuple]) -> None:
+    """Write queued audit entries, ignoring errors if audit table doesn't exist."""
+    try:
+        log_actions(batch)
+    except Exception as e:
+        logger.warning("Could not log %d action(s): %s", len(batch), e)
+
+
+def _audit_writer() -> None:
+    """Background loop draining the audit queue until a None sentinel arrives."""
+    while True:
+        entry = _AUDIT_QUEUE.get()
+        if entry is None:
+            return
+        
+        batch = [entry]
+        stop = False
+        deadline = time.monotonic() + _AUDIT_FLUSH_INTERVAL
+        while len(batch) < _AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = _AUDIT_QUEUE.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                stop = True
+                break
+            batch.append(entry)
+        
+        _write_audit_batch(batch)
+        if stop:
+            return
+
+
+_audit_thread = threading.Thread(target=_audit_writer, name="audit-writer", daemon=True)
+_audit_thread.start()
+
+
+def flush_audit_log(timeout: float = 5.0) -> None:
+    """
+    Write any pending audit entries and stop the writer thread.
+    
+    Safe to call again: once the writer is gone, entries still queued
+    (logged while it was being stopped) are written synchronously.
+    
+    Args:
+        timeout: Seconds to wait for the writer thread
+    """
+    _audit_stopped.set()
+    if _audit_thread.is_alive():
+        _AUDIT_QUEUE.put(None)
+        _audit_thread.join(timeout)
+    if _audit_thread.is_alive():
+        return
+    
+    batch = []
+    while True:
+        try:
+            entry = _AUDIT_QUEUE.get_nowait()
+        except queue.Empty:
+            break
+        if entry is not None:
+            batch.append(entry)
+    if batch:
+        _write_audit_batch(batch)
+
+
+# Also drain the queue when the process exits without the app's shutdown
+atexit.register(flush_audit_log)
 
 
 # =============================================================================
@@ -162,7 +385,22 @@ def get_all_rules() -> list[PortMapping]:
         List of all PortMapping records
     """
     with Session(engine) as session:
-        return list(session.exec(select(PortMapping)).all())
+        return list(session.exec(_ALL_RULES_STMT).all())
+
+
+def get_rule_records() -> list[RuleRecord]:
+    """
+    Retrieve the fields iptables needs from every port forwarding rule.
+    
+    Rows are read on a Core connection and become plain RuleRecord
+    tuples, skipping PortMapping construction and the instrumented
+    attribute access that comes with it.
+    
+    Returns:
+        List of RuleRecord tuples
+    """
+    with engine.connect() as conn:
+        return list(map(RuleRecord._make, conn.execute(_RULE_COLUMNS_STMT).tuples()))
 
 
 def add_rule_to_db(rule: PortMapping) -> PortMapping:
@@ -178,18 +416,62 @@ def add_rule_to_db(rule: PortMapping) -> PortMapping:
     Raises:
         ValueError: If the external port is already in use
     """
+    # The unique index on external_port does the duplicate check, in the
+    # same statement and without a check-then-insert race. No RETURNING:
+    # it needs SQLite 3.35, newer than some supported hosts ship.
+    stmt = (
+        sqlite_insert(PortMapping)
+        .values(**rule.model_dump(exclude={"id"}))
+        .on_conflict_do_nothing(index_elements=["external_port"])
+    )
+    with engine.begin() as conn:
+        result = conn.execute(stmt)
+    
+    if result.rowcount == 0:
+        raise ValueError(f"Port {rule.external_port} is already mapped")
+    
+    rule.id = result.inserted_primary_key[0]
+    return rule
+
+
+def add_rules_to_db(rules: list[PortMapping]) -> list[PortMapping]:
+    """
+    Add several port forwarding rules in a single transaction.
+    
+    Either all rules are stored or none are.
+    
+    Args:
+        rules: The port mapping configurations to add
+        
+    Returns:
+        The created PortMappings with assigned IDs
+        
+    Raises:
+        ValueError: If an external port is already in use or repeated
+    """
+    ports = set()
+    for rule in rules:
+        if rule.external_port in ports:
+            raise ValueError(f"Port {rule.external_port} is mapped more than once")
+        ports.add(rule.external_port)
+    
     with Session(engine) as session:
         existing = session.exec(
-            select(PortMapping).where(PortMapping.external_port == rule.external_port)
+            select(PortMapping.external_port).where(PortMapping.external_port.in_(ports))
         ).first()
         
-        if existing:
-            raise ValueError(f"Port {rule.external_port} is already mapped")
+        if existing is not None:
+            raise ValueError(f"Port {existing} is already mapped")
         
-        session.add(rule)
-        session.commit()
-        session.refresh(rule)
-        return rule
+        session.add_all(rules)
+        try:
+            session.commit()
+        except IntegrityError:
+            # Another request mapped one of the ports since the check
+            raise ValueError("A port in this batch is already mapped")
+        for rule in rules:
+            session.refresh(rule)
+        return rules
 
 
 def delete_rule_from_db(external_port: int) -> bool:
@@ -5,18 +5,69 @@ A lightweight web interface for managing Linux Containers (LXC) on Debian/Ubuntu
 Provides container lifecycle management, network configuration, and backup functionality.
 """
 
+import asyncio
+import logging
+import threading
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 
 from backend.api.routers import containers, settings, network
-from backend.database import create_db_and_tables
+from backend.database import create_db_and_tables, flush_audit_log
 from backend.core.network import net_manager
 
 
+logger = logging.getLogger(__name__)
+
+# Background network initialization started by lifespan(); /api/health
+# reports "starting" until it is done
+_network_init: Optional[asyncio.Future] = None
+
+# Longest shutdown waits for that initialization (e.g. a hung iptables call)
+NETWORK_INIT_SHUTDOWN_TIMEOUT = 10.0
+
+
+def _initialize_network() -> None:
+    """Apply network rules to the kernel, logging instead of raising."""
+    try:
+        net_manager.initialize_network()
+    except Exception as e:
+        logger.critical("Failed to initialize network: %s", e)
+
+
+def _start_network_init() -> asyncio.Future:
+    """
+    Run _initialize_network() on a daemon thread.
+    
+    Unlike asyncio.to_thread(), whose executor is joined when the event
+    loop closes, a hung iptables call then cannot keep the process from
+    exiting once shutdown stops waiting for it.
+    
+    Returns:
+        Future resolved when initialization is done
+    """
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    
+    def _resolve() -> None:
+        if not done.done():
+            done.set_result(None)
+    
+    def _run() -> None:
+        _initialize_network()
+        try:
+            loop.call_soon_threadsafe(_resolve)
+        except RuntimeError:
+            pass  # Event loop already closed
+    
+    threading.Thread(target=_run, name="network-init", daemon=True).start()
+    return done
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -24,19 +75,45 @@ async def lifespan(app: FastAPI):
     
     Startup:
         - Creates database tables if they don't exist
-        - Initializes network rules from database to kernel
+        - Starts initializing network rules from database to kernel in
+          the background, so requests are served while it runs
+    
+    Shutdown:
+        - Waits up to NETWORK_INIT_SHUTDOWN_TIMEOUT seconds for network
+          initialization to finish
+        - Stops the backup/creation worker pools
+        - Applies any pending DHCP reload, and the pending (debounced)
+          rule sync if initialization finished
+        - Flushes queued audit log entries
     """
+    global _network_init
+    
     # Startup
     create_db_and_tables()
-    
-    try:
-        net_manager.initialize_network()
-    except Exception as e:
-        print(f"CRITICAL: Failed to initialize network: {e}")
+    _network_init = _start_network_init()
     
     yield
     
-    # Shutdown (cleanup if needed)
+    # Shutdown
+    try:
+        await asyncio.wait_for(_network_init, NETWORK_INIT_SHUTDOWN_TIMEOUT)
+        network_ready = True
+    except asyncio.TimeoutError:
+        logger.error(
+            "Network initialization still running after %ss; shutting down without it",
+            NETWORK_INIT_SHUTDOWN_TIMEOUT,
+        )
+        network_ready = False
+    
+    containers.shutdown_workers()
+    net_manager.flush_pending_dhcp_reload()
+    # A hung initialization may hold the rule lock the sync needs
+    if network_ready:
+        try:
+            net_manager.flush_pending_sync()
+        except Exception as e:
+            logger.error("Failed to apply pending network rules: %s", e)
+    flush_audit_log()
 
 
 app = FastAPI(
@@ -74,7 +151,11 @@ def health_check():
     """
     Health check endpoint for monitoring.
     
+    Reports 503 "starting" until startup network initialization is done.
+    
     Returns:
         dict: Status information including database type
     """
+    if _network_init is None or not _network_init.done():
+        return JSONResponse(status_code=503, content={"status": "starting"})
     return {"status": "healthy", "database": "SQLite"}
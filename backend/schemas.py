@@ -41,6 +41,16 @@ class CreateContainerRequest(BaseModel):
     arch: str = Field(default="amd64")
 
 
+class BulkContainerRequest(BaseModel):
+    """
+    Request payload for applying one lifecycle action to many containers.
+    
+    Attributes:
+        names: Containers to act on (duplicates are ignored)
+    """
+    names: List[str] = Field(..., min_length=1)
+
+
 class ConfigUpdate(BaseModel):
     """
     Request payload for updating application settings.